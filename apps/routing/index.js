@@ -18,20 +18,18 @@ map.on('load', () => {
     //show dynamic map instead of static background
     document.getElementById("map").style.visibility = "visible";
     //add routing layer and an empty source (as no route currently)
-    map.addSource("myImageSource", {
-        "type": "image",
-        "url": "pollution.png",
-        "coordinates": [
-            [-0.550992140362932, 51.71276304828286],
-            [0.3764553855290124, 51.71276304828286],
-            [0.3764553855290124, 51.26638747107266],
-            [-0.550992140362932, 51.26638747107266]
-        ]
+    //pollution overlay tiles, only the tiles in view are fetched
+    map.addSource("pollutionTiles", {
+        "type": "raster",
+        "tiles": ["http://127.0.0.1:8000/tiles/{z}/{x}/{y}.png"],
+        "tileSize": 256,
+        "minzoom": 10,
+        "maxzoom": 16
     });
 
     map.addLayer({
         "id": "overlay",
-        "source": "myImageSource",
+        "source": "pollutionTiles",
         "type": "raster",
         "paint": {
             "raster-opacity": 0.3
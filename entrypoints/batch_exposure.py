@@ -0,0 +1,233 @@
+"""Route many origin-destination trips and record their length and pollution."""
+
+from enum import Enum
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import numpy as np
+import pandas as pd
+import typer
+from routex import astar, mospp_fronts
+from urbanroute.serving import RoutingGraph, distance_heuristic
+from urbanroute.serving.encoding import encode_polyline
+
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
+)
+logger = logging.getLogger("Batch exposure")
+
+# read-only graph shared with the forked worker processes
+GRAPH: Optional[RoutingGraph] = None
+TRIP_COLUMNS = ["source_lat", "source_long", "target_lat", "target_long"]
+# settings of the job that wrote an output directory, checked when it is resumed
+METADATA_FILE = "metadata.json"
+
+
+class Algorithm(str, Enum):
+    """Which routes are found for each trip.
+
+    route: the shortest route.
+    pollution: the least polluted route.
+    mospp: every pareto optimal route minimising length and pollution.
+    """
+
+    route = "route"
+    pollution = "pollution"
+    mospp = "mospp"
+
+
+def route_trip(
+    graph: RoutingGraph,
+    algorithm: Algorithm,
+    source_coord: Tuple[float, float],
+    target_coord: Tuple[float, float],
+) -> Tuple[List[np.ndarray], List[Tuple[float, float]]]:
+    """The vertices of each route of a trip, from source to target, and the total
+    length and exposure of each route."""
+    source = graph.match(source_coord)
+    target = graph.match(target_coord)
+    graph.prune(source, target)
+    if algorithm == Algorithm.mospp:
+        front = list(
+            mospp_fronts(
+                graph.G.vertex(source),
+                graph.G.vertex(target),
+                graph.float_length,
+                graph.pollution,
+                partial=False,
+            )
+        )[-1]
+        routes = [
+            np.array([int(v) for v in route], dtype=np.int64) for route in front.routes
+        ]
+        # the costs of the front tell apart routes through different parallel edges
+        return routes, front.costs
+    attribute = "float_length" if algorithm == Algorithm.route else "pollution"
+    route = astar(
+        graph.G,
+        source,
+        target,
+        graph.G.edge_properties[attribute],
+        distance_heuristic,
+        graph.pos,
+    )
+    # A* gives the route from the target back to the source
+    route = np.array([int(v) for v in route[::-1]], dtype=np.int64)
+    return [route], [graph.totals(route, 1.0 if algorithm == Algorithm.route else 0.0)]
+
+
+def part_path(output: str, index: int) -> str:
+    """Location of the results of one chunk of trips."""
+    return os.path.join(output, "part-{:06d}.parquet".format(index))
+
+
+def process_chunk(task) -> Tuple[int, int]:
+    """Route a chunk of trips and write the results, returning the chunk index and size.
+    The part file only appears once the whole chunk is written, so it marks the chunk
+    as done when a job is resumed."""
+    index, trips, algorithm, geometry, output = task
+    rows = []
+    for trip in trips.itertuples(index=False):
+        try:
+            routes, totals = route_trip(
+                GRAPH,
+                algorithm,
+                (trip.source_lat, trip.source_long),
+                (trip.target_lat, trip.target_long),
+            )
+        except Exception as error:  # pylint: disable=broad-except
+            rows.append(dict(trip_id=trip.trip_id, route=0, error=str(error)))
+            continue
+        for i, (route, (length, exposure)) in enumerate(zip(routes, totals)):
+            row = dict(trip_id=trip.trip_id, route=i, length=length, exposure=exposure)
+            if geometry:
+                row["geometry"] = encode_polyline(
+                    GRAPH.float_y.a[route], GRAPH.float_x.a[route]
+                )
+            rows.append(row)
+    columns = ["trip_id", "route", "length", "exposure", "error"]
+    if geometry:
+        columns.insert(4, "geometry")
+    results = pd.DataFrame(rows, columns=columns)
+    path = part_path(output, index)
+    results.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    return index, len(trips)
+
+
+def read_trips(trips: str) -> pd.DataFrame:
+    """Read trips from csv or parquet, numbering them if there is no trip_id column."""
+    if trips.endswith(".parquet"):
+        df = pd.read_parquet(trips)
+    else:
+        df = pd.read_csv(trips)
+    missing = set(TRIP_COLUMNS) - set(df.columns)
+    if missing:
+        raise ValueError("Trips are missing the columns {}".format(sorted(missing)))
+    if "trip_id" not in df.columns:
+        df["trip_id"] = np.arange(len(df))
+    return df[["trip_id"] + TRIP_COLUMNS]
+
+
+def job_metadata(
+    df: pd.DataFrame, algorithm: Algorithm, geometry: bool, chunk_size: int
+) -> Dict:
+    """Settings that the part files of a job depend on, with the first and last
+    trip_id of each chunk."""
+    ends = range(chunk_size, len(df) + chunk_size, chunk_size)
+    return {
+        "algorithm": Algorithm(algorithm).value,
+        "geometry": geometry,
+        "chunk_size": chunk_size,
+        "trips": len(df),
+        "chunks": [
+            df["trip_id"].iloc[[end - chunk_size, min(end, len(df)) - 1]].tolist()
+            for end in ends
+        ],
+    }
+
+
+def check_metadata(output: str, metadata: Dict) -> None:
+    """
+    Write the metadata of a job to its output directory, or check that it matches
+    the metadata of the job being resumed, as otherwise the part files already
+    written would hold other trips or other results.
+    Raises:
+        ValueError: if the output directory has results of a different job.
+    """
+    path = os.path.join(output, METADATA_FILE)
+    if os.path.isfile(path):
+        with open(path, "r") as read_file:
+            previous = json.load(read_file)
+        if previous != metadata:
+            changed = sorted(
+                key
+                for key in set(previous) | set(metadata)
+                if previous.get(key) != metadata.get(key)
+            )
+            raise ValueError(
+                "{} has results of a job with different {}, use another output "
+                "directory".format(output, ", ".join(changed))
+            )
+        return
+    if any(name.startswith("part-") for name in os.listdir(output)):
+        raise ValueError(
+            "{} has results without {}, use another output directory".format(
+                output, METADATA_FILE
+            )
+        )
+    with open(path, "w") as write_file:
+        json.dump(metadata, write_file)
+
+
+def main(  # pylint: disable=too-many-arguments
+    trips: str,
+    output: str,
+    graph: str = "../graphs/Trafalgar.gt",
+    algorithm: Algorithm = Algorithm.pollution,
+    geometry: bool = False,
+    chunk_size: int = 10000,
+    processes: Optional[int] = None,
+):
+    """
+    trips: csv or parquet file of source_lat, source_long, target_lat, target_long
+        and optionally trip_id for every trip.
+    output: directory the results are written to, one parquet file per chunk of trips.
+        Chunks already in the directory are skipped, so a stopped job can be resumed
+        with the same trips and options.
+    graph: graph in .gt format covering every trip.
+    algorithm: route, pollution or mospp.
+    geometry: also write the encoded polyline of every route.
+    chunk_size: number of trips in each chunk.
+    processes: number of worker processes, defaults to the number of cpus.
+    """
+    global GRAPH  # pylint: disable=global-statement
+    df = read_trips(trips)
+    os.makedirs(output, exist_ok=True)
+    check_metadata(output, job_metadata(df, algorithm, geometry, chunk_size))
+    chunks = [
+        (index, df.iloc[start : start + chunk_size], algorithm, geometry, output)
+        for index, start in enumerate(range(0, len(df), chunk_size))
+    ]
+    todo = [
+        chunk for chunk in chunks if not os.path.isfile(part_path(output, chunk[0]))
+    ]
+    logger.info(
+        "%s trips in %s chunks, %s already done",
+        len(df),
+        len(chunks),
+        len(chunks) - len(todo),
+    )
+    # load the graph once, forked workers share its memory until they write to it
+    GRAPH = RoutingGraph.load(graph)
+    done = sum(len(chunk[1]) for chunk in chunks) - sum(len(chunk[1]) for chunk in todo)
+    with get_context("fork").Pool(processes) as pool:
+        for index, size in pool.imap_unordered(process_chunk, todo):
+            done += size
+            logger.info("Chunk %s written, %s of %s trips done", index, done, len(df))
+
+
+if __name__ == "__main__":
+    typer.run(main)
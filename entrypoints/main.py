@@ -1,71 +1,79 @@
 """Find the least cost path from source to target by minimising air pollution."""
 
-from typing import Tuple, List, Dict
+# time every import below when URBANROUTE_PROFILE_STARTUP is set
+from urbanroute.profiling import StartupProfile
+
+PROFILE = StartupProfile.from_env()
+
+# pylint: disable=wrong-import-position,wrong-import-order
+from contextlib import nullcontext
+from typing import Tuple, List, Dict, Iterator, Optional
+import json
 import logging
-import time
-import typer
+import os
+from multiprocessing import Pool
 import numpy as np
-from fastapi import FastAPI
-from graph_tool.all import load_graph, EdgePropertyMap
-from haversine import haversine
-from cleanair.loggers import get_logger
-from routex import astar, mospp
-from urbanroute.geospatial import (
-    ellipse_bounding_box,
-    coord_match,
-    remove_leaves,
-    remove_paths,
+import typer
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from routex import (
+    astar,
+    mospp_fronts,
+    constrained_shortest_path,
+    parallel_mospp,
+    CSRGraph,
+    ParetoFront,
 )
+from urbanroute.geospatial import parse_box, parse_polygon
+from urbanroute.serving import (
+    GraphRegistry,
+    RegionNotFound,
+    RoutingGraph,
+    distance_heuristic,
+)
+from urbanroute.serving.encoding import Encoding
+from urbanroute.tiles.coords import tile_path
 
 APP = FastAPI()
-logger = get_logger("Shortest path entrypoint")
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
+)
+logger = logging.getLogger("Shortest path entrypoint")
 logger.setLevel(logging.DEBUG)
-logger.info("Loading graph of London...")
-start = time.time()
-G = load_graph("../graphs/Trafalgar.gt")
-logger.info("Graph loaded in %s seconds.", time.time() - start)
-logger.info("%s nodes and %s edges in the graph.", G.num_vertices, G.num_edges)
-
-# add position property, and add float versions of string edge attributes
-pos = G.new_vertex_property("vector<double>")
-float_length = G.new_edge_property("double")
-float_x = G.new_vertex_property("double")
-float_y = G.new_vertex_property("double")
-G.edge_properties["float_length"] = float_length
-pollution = G.new_edge_property("double")
-mean = G.edge_properties["NO2_mean"]
-length = G.edge_properties["length"]
-# used in linear scalarisation
-scalarisation = G.new_edge_property("double")
-x = G.vertex_properties["x"]
-y = G.vertex_properties["y"]
-for v in G.get_vertices():
-    pos[v] = [float(x[v]), float(y[v])]
-    float_x[v] = float(x[v])
-    float_y[v] = float(y[v])
-for e in G.edges():
-    float_length[e] = float(length[e])
-    pollution[e] = float(mean[e]) * float(length[e])
-
-inside = G.new_vertex_property("bool")
-del_list = G.new_vertex_property("bool")
-for v in G.vertices():
-    del_list[v] = True
-
-# do graph simplification
-remove_leaves(G, del_list)
-remove_paths(G, del_list, pos, length, pollution)
-
-# set up numpy array of vertices with just the position
-vertices = G.get_vertices(vprops=[float_x, float_y])
-vertices = np.delete(vertices, 0, 1)
-
-
-def distance_heuristic(v, target, pos):
-    """the distance heuristic is the haversine distance, it can also be used for pollution"""
-    return haversine(
-        (pos[v].a[0], pos[v].a[1]), (pos[target].a[0], pos[target].a[1]), unit="m"
+# graphs of each region are loaded on first use and evicted when over the budget,
+# which is compared with the measured and estimated size of each graph
+MEMORY_BUDGET = os.environ.get("URBANROUTE_GRAPH_MEMORY_MB")
+with PROFILE.stage("registry") if PROFILE else nullcontext():
+    REGISTRY = GraphRegistry.from_file(
+        os.environ.get("URBANROUTE_REGIONS", "../graphs/regions.json"),
+        memory_budget=int(MEMORY_BUDGET) * 2 ** 20 if MEMORY_BUDGET else None,
+    )
+logger.info("Serving regions %s", list(REGISTRY.regions))
+# pollution overlay tiles written by graphs/load_trafalgar_square.py
+TILES = os.environ.get("URBANROUTE_TILES", "../graphs/tiles")
+TILE_HEADERS = {"Cache-Control": "public, max-age=86400"}
+# default "length,pollution" epsilon of approximate pareto fronts, exact if unset
+MOSPP_EPSILON = os.environ.get("URBANROUTE_MOSPP_EPSILON")
+MOSPP_EPSILON = (
+    tuple(float(e) for e in MOSPP_EPSILON.split(",")) if MOSPP_EPSILON else None
+)
+if MOSPP_EPSILON is not None and (len(MOSPP_EPSILON) != 2 or min(MOSPP_EPSILON) < 0):
+    raise ValueError(
+        "URBANROUTE_MOSPP_EPSILON must be two non-negative length,pollution epsilons"
     )
+# processes used by each exact /mospp/ query, a single process if unset
+MOSPP_PROCESSES = os.environ.get("URBANROUTE_MOSPP_PROCESSES")
+MOSPP_PROCESSES = int(MOSPP_PROCESSES) if MOSPP_PROCESSES else None
+# started once, before any graph is loaded, and shared by every /mospp/ query
+MOSPP_POOL = Pool(MOSPP_PROCESSES) if MOSPP_PROCESSES else None
+if PROFILE:
+    # load the first region now rather than on its first query, to time it too
+    FIRST_REGION = next(iter(REGISTRY.regions), None)
+    if FIRST_REGION is not None:
+        with PROFILE.stage("load graph " + FIRST_REGION):
+            REGISTRY[FIRST_REGION]  # pylint: disable=pointless-statement
+    PROFILE.log()
 
 
 def empty_heuristic():
@@ -73,118 +81,271 @@ def empty_heuristic():
     return 0
 
 
+def mospp_epsilon(
+    length_epsilon: Optional[float], pollution_epsilon: Optional[float]
+) -> Optional[Tuple[float, float]]:
+    """
+    Epsilon of the approximate pareto front, exact if neither is given in the
+    request nor by the URBANROUTE_MOSPP_EPSILON environment variable.
+    length_epsilon: factor within which routes of similar length are treated as equal.
+    pollution_epsilon: factor within which routes of similar pollution are treated as equal.
+    An epsilon of 0, or one not given when the other is, compares that cost exactly.
+    The epsilon is applied to the labels at every vertex, so a route of k edges of the
+    exact front is only guaranteed to have a route within a factor of
+    (1 + epsilon) ** k of it in the approximate front.
+    """
+    if length_epsilon is None and pollution_epsilon is None:
+        return MOSPP_EPSILON
+    return (length_epsilon or 0.0, pollution_epsilon or 0.0)
+
+
+def avoid_areas(
+    avoid_box: Optional[List[str]], avoid_polygon: Optional[List[str]]
+) -> List[np.ndarray]:
+    """
+    Polygons that routes must not cross.
+    avoid_box: "west,south,east,north" bounding boxes.
+    avoid_polygon: "longitude,latitude,longitude,latitude,..." polygons.
+    Raises an HTTP 422 error if any of them is malformed.
+    """
+    try:
+        return [parse_box(box) for box in avoid_box or []] + [
+            parse_polygon(polygon) for polygon in avoid_polygon or []
+        ]
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from error
+
+
+async def region_graph(*coords: Tuple[float, float]) -> RoutingGraph:
+    """
+    The graph of the smallest region containing every coordinate. A graph that is
+    not in memory is loaded in a worker thread, so queries of other regions are
+    answered while it loads. The queries themselves still run one at a time on the
+    event loop, as they share the filters of their graph, see RoutingGraph.prune.
+    """
+    return await run_in_threadpool(REGISTRY.get, *coords)
+
+
 def return_a_star(
+    graph: RoutingGraph,
     source_coord: Tuple[float, float],
     target_coord: Tuple[float, float],
-    attribute: EdgePropertyMap,
+    attribute: str,
+    avoid: Optional[List[np.ndarray]] = None,
+    encoding: Encoding = Encoding.json,
 ) -> List[Dict[str, str]]:
     """
-    Find the least polluted path.
-    secretfile: Path to the database secretfile.
-    instance_id: Id of the air quality trained model.
+    Find the least cost path.
+    graph: graph of the region containing the source and target, see region_graph.
     source: (source latitude, source longitude) for source point.
     target: (target latitude, target longitude) for target point.
-    verbose: enable debug logging.
+    attribute: name of the edge property to minimise, float_length or pollution.
+    avoid: polygons of longitude, latitude that the route must not cross.
+    encoding: json, or a compact encoding with the total length and exposure.
     """
     # find vertices in the graph that are close enough to the start/target coordinates
     # any vertex within the minimum rectangle is sufficient
-    source = coord_match(vertices, source_coord, pos)
-    target = coord_match(vertices, target_coord, pos)
-    # create box around the source and target vertices to eliminate points
-    # that are (probably) too far away to be part of a shortest path
-    box = ellipse_bounding_box(pos[source], pos[target])
-
-    lower_left = np.array([box[3], box[1]])
-    upper_right = np.array([box[2], box[0]])
-    # Euclidean heuristic. If a vertex is not in the box, make its heuristic value infinite
-    # so that it is never extended
-    indices = np.all(
-        np.logical_and(lower_left <= vertices, vertices <= upper_right), axis=1
+    source = graph.match(source_coord)
+    target = graph.match(target_coord)
+    graph.prune(source, target, avoid)
+
+    # A* gives the route from the target back to the source
+    route = astar(
+        graph.G,
+        source,
+        target,
+        graph.G.edge_properties[attribute],
+        distance_heuristic,
+        graph.pos,
+    )[::-1]
+    if encoding == Encoding.json:
+        return graph.coordinates(route)
+    return graph.encode(
+        [route], encoding, weight=1.0 if attribute == "float_length" else 0.0
     )
-    # include the main delete list as a filter also
-    inside.a = np.logical_and(indices, del_list.a)
-    # preserve source and target
-    inside[source] = True
-    inside[target] = True
-    G.set_vertex_filter(inside)
-
-    route = astar(G, source, target, attribute, distance_heuristic, pos)
-    return [{"x": x[r], "y": y[r]} for r in route]
 
 
 def return_linear_scalarisation(
-    source_coord: Tuple[float, float], target_coord: Tuple[float, float], weight: float
+    graph: RoutingGraph,
+    source_coord: Tuple[float, float],
+    target_coord: Tuple[float, float],
+    weight: float,
+    avoid: Optional[List[np.ndarray]] = None,
+    encoding: Encoding = Encoding.json,
 ):
-    """Get shortest path where each edge cost is weight * distance + (1-weight) * pollution"""
+    """
+    Get shortest path where each edge cost is weight * distance + (1-weight) * pollution.
+    graph: graph of the region containing the source and target, see region_graph.
+    avoid: polygons of longitude, latitude that the route must not cross.
+    """
     # find vertices in the graph that are close enough to the start/target coordinates
     # any vertex within the minimum rectangle is sufficient
-    source = coord_match(vertices, source_coord, pos)
-    target = coord_match(vertices, target_coord, pos)
-    # create box around the source and target vertices to eliminate points
-    # that are (probably) too far away to be part of a shortest path
-    box = ellipse_bounding_box(pos[source], pos[target])
-
-    lower_left = np.array([box[3], box[1]])
-    upper_right = np.array([box[2], box[0]])
-    # Euclidean heuristic. If a vertex is not in the box, make its heuristic value infinite
-    # so that it is never extended
-    indices = np.all(
-        np.logical_and(lower_left <= vertices, vertices <= upper_right), axis=1
-    )
-    # include the main delete list as a filter also
-    inside.a = np.logical_and(indices, del_list.a)
-    # preserve source and target
-    inside[source] = True
-    inside[target] = True
-    G.set_vertex_filter(inside)
-    for e in G.edges():
-        scalarisation[e] = weight * float_length[e] + (1 - weight) * pollution[e]
-    route = astar(G, source, target, scalarisation, empty_heuristic, pos)
-    return [{"x": x[r], "y": y[r]} for r in route]
+    source = graph.match(source_coord)
+    target = graph.match(target_coord)
+    graph.prune(source, target, avoid)
+    for e in graph.G.edges():
+        graph.scalarisation[e] = (
+            weight * graph.float_length[e] + (1 - weight) * graph.pollution[e]
+        )
+    # A* gives the route from the target back to the source
+    route = astar(
+        graph.G, source, target, graph.scalarisation, empty_heuristic, graph.pos
+    )[::-1]
+    if encoding == Encoding.json:
+        return graph.coordinates(route)
+    return graph.encode([route], encoding, weight=weight)
 
 
 def return_mospp(
-    source_coord: Tuple[float, float], target_coord: Tuple[float, float],
-) -> List[Dict[str, str]]:
+    graph: RoutingGraph,
+    source_coord: Tuple[float, float],
+    target_coord: Tuple[float, float],
+    deadline: Optional[float] = None,
+    epsilon: Optional[Tuple[float, float]] = None,
+    avoid: Optional[List[np.ndarray]] = None,
+    encoding: Encoding = Encoding.json,
+) -> ParetoFront:
+    """
+    Find the pareto set of paths minimising length and pollution.
+    graph: graph of the region containing the source and target, see region_graph.
+    source: (source latitude, source longitude) for source point.
+    target: (target latitude, target longitude) for target point.
+    deadline: seconds after which the front found so far is returned.
+    epsilon: (length, pollution) factors within which routes are treated as equal.
+    avoid: polygons of longitude, latitude that the routes must not cross.
+    encoding: json, or a compact encoding with the total length and exposure
+        in which routes share the vertices they start with.
+    """
+    # find vertices in the graph that are close enough to the start/target coordinates
+    # any vertex within the minimum rectangle is sufficient
+    source = graph.match(source_coord)
+    target = graph.match(target_coord)
+    graph.prune(source, target, avoid)
+
+    if MOSPP_POOL is not None and deadline is None and epsilon is None:
+        # merge the labels of the pruned graph across the processes of the pool
+        routes, costs = parallel_mospp(
+            CSRGraph.from_graph_tool(
+                graph.G, {"length": graph.float_length, "pollution": graph.pollution}
+            ),
+            source,
+            target,
+            processes=MOSPP_PROCESSES,
+            pool=MOSPP_POOL,
+            with_costs=True,
+        )
+        front = ParetoFront(routes, True, costs)
+    else:
+        front = None
+        for front in mospp_fronts(
+            graph.G.vertex(source),
+            graph.G.vertex(target),
+            graph.float_length,
+            graph.pollution,
+            deadline=deadline,
+            partial=False,
+            epsilon=epsilon,
+        ):
+            pass
+    if encoding == Encoding.json:
+        return ParetoFront(
+            [graph.coordinates(route) for route in front.routes], front.complete
+        )
+    return ParetoFront(
+        # the costs of the front tell apart routes through different parallel edges
+        graph.encode(front.routes, encoding, share_prefixes=True, totals=front.costs),
+        front.complete,
+    )
+
+
+def stream_mospp(
+    graph: RoutingGraph,
+    source_coord: Tuple[float, float],
+    target_coord: Tuple[float, float],
+    deadline: Optional[float] = None,
+    epsilon: Optional[Tuple[float, float]] = None,
+    avoid: Optional[List[np.ndarray]] = None,
+) -> Iterator[str]:
     """
-    Find the least polluted path.
-    secretfile: Path to the database secretfile.
-    instance_id: Id of the air quality trained model.
+    Server-sent events of the pareto front, a "front" event each time a route to the
+    target is settled, the last of which is marked complete unless the deadline passed,
+    followed by a "done" event.
+    graph: graph of the region containing the source and target, see region_graph.
     source: (source latitude, source longitude) for source point.
     target: (target latitude, target longitude) for target point.
-    verbose: enable debug logging.
+    deadline: seconds after which the front found so far is the last front.
+    epsilon: (length, pollution) factors within which routes are treated as equal.
+    avoid: polygons of longitude, latitude that the routes must not cross.
     """
     # find vertices in the graph that are close enough to the start/target coordinates
     # any vertex within the minimum rectangle is sufficient
-    source = coord_match(vertices, source_coord, pos)
-    target = coord_match(vertices, target_coord, pos)
-    # create box around the source and target vertices to eliminate points
-    # that are (probably) too far away to be part of a shortest path
-    box = ellipse_bounding_box(pos[source], pos[target])
-
-    lower_left = np.array([box[3], box[1]])
-    upper_right = np.array([box[2], box[0]])
-    # Euclidean heuristic. If a vertex is not in the box, make its heuristic value infinite
-    # so that it is never extended
-    indices = np.all(
-        np.logical_and(lower_left <= vertices, vertices <= upper_right), axis=1
+    source = graph.match(source_coord)
+    target = graph.match(target_coord)
+    graph.prune(source, target, avoid)
+    # the events are sent from another thread while further queries change the filter
+    view = graph.snapshot()
+    fronts = mospp_fronts(
+        view.vertex(source),
+        view.vertex(target),
+        graph.float_length,
+        graph.pollution,
+        deadline=deadline,
+        epsilon=epsilon,
     )
-    # include the main delete list as a filter also
-    inside.a = np.logical_and(indices, del_list.a)
-    # preserve source and target
-    inside[source] = True
-    inside[target] = True
-    G.set_vertex_filter(inside)
 
-    routes = mospp(G.vertex(source), G.vertex(target), float_length, pollution)
-    return [[{"x": x[r], "y": y[r]} for r in route] for route in routes]
+    def events():
+        for front in fronts:
+            data = {
+                "routes": [graph.coordinates(route) for route in front.routes],
+                "complete": front.complete,
+            }
+            yield "event: front\ndata: {}\n\n".format(json.dumps(data))
+        yield "event: done\ndata: {}\n\n"
+
+    return events()
+
+
+def return_constrained(
+    graph: RoutingGraph,
+    source_coord: Tuple[float, float],
+    target_coord: Tuple[float, float],
+    max_detour: float,
+    avoid: Optional[List[np.ndarray]] = None,
+    encoding: Encoding = Encoding.json,
+) -> List[Dict[str, str]]:
+    """
+    Find the least polluted path that is at most max_detour longer than the shortest.
+    graph: graph of the region containing the source and target, see region_graph.
+    source: (source latitude, source longitude) for source point.
+    target: (target latitude, target longitude) for target point.
+    max_detour: fraction of the shortest path length the route may add.
+    avoid: polygons of longitude, latitude that the route must not cross.
+    encoding: json, or a compact encoding with the total length and exposure.
+    """
+    # find vertices in the graph that are close enough to the start/target coordinates
+    # any vertex within the minimum rectangle is sufficient
+    source = graph.match(source_coord)
+    target = graph.match(target_coord)
+    graph.prune(source, target, avoid)
+
+    route = constrained_shortest_path(
+        graph.G,
+        source,
+        target,
+        graph.pollution,
+        graph.float_length,
+        max_detour=max_detour,
+    )
+    if encoding == Encoding.json:
+        return graph.coordinates(route)
+    return graph.encode([route], encoding, weight=0.0)
 
 
 def main(  # pylint: disable=too-many-arguments
     source_lat: float = 51.510357,
     source_long: float = -0.116773,
-    target_lat: float = 51.529972,
-    target_long: float = -0.127676,
+    target_lat: float = 51.514500,
+    target_long: float = -0.127500,
 ) -> List[Dict[str, str]]:
     """
     sourceLat: latitude of the source point.
@@ -192,18 +353,37 @@ def main(  # pylint: disable=too-many-arguments
     targetLat: latitude of the target point.
     targetLong: longitude of the target point.
     """
-    return return_a_star(
-        (source_lat, source_long), (target_lat, target_long), float_length
-    )
+    source, target = (source_lat, source_long), (target_lat, target_long)
+    return return_a_star(REGISTRY.get(source, target), source, target, "float_length")
 
 
 if __name__ == "__main__":
     typer.run(main)
 
 
+@APP.on_event("shutdown")
+def close_mospp_pool():
+    """Stop the worker processes of /mospp/ queries."""
+    if MOSPP_POOL is not None:
+        MOSPP_POOL.close()
+        MOSPP_POOL.join()
+
+
+@APP.exception_handler(RegionNotFound)
+async def region_not_found(_: Request, error: RegionNotFound) -> JSONResponse:
+    """Queries outside every region that is served are not found."""
+    return JSONResponse(status_code=404, content={"detail": str(error)})
+
+
 @APP.get("/route/")
 async def get_route(
-    source_lat: float, source_long: float, target_lat: float, target_long: float
+    source_lat: float,
+    source_long: float,
+    target_lat: float,
+    target_long: float,
+    avoid_box: List[str] = Query(None),
+    avoid_polygon: List[str] = Query(None),
+    encoding: Encoding = Encoding.json,
 ) -> List[Dict[str, str]]:
     """
     API route to get route from A to B.
@@ -211,15 +391,30 @@ async def get_route(
     sourceLong: longitude of the source point.
     targetLat: latitude of the target point.
     targetLong: longitude of the target point.
+    avoidBox: "west,south,east,north" of an area the route must not cross, repeatable.
+    avoidPolygon: "longitude,latitude,longitude,latitude,..." of an area the route
+        must not cross, repeatable.
+    encoding: json, polyline or array, see Encoding.
     """
     return return_a_star(
-        (source_lat, source_long), (target_lat, target_long), float_length
+        await region_graph((source_lat, source_long), (target_lat, target_long)),
+        (source_lat, source_long),
+        (target_lat, target_long),
+        "float_length",
+        avoid_areas(avoid_box, avoid_polygon),
+        encoding,
     )
 
 
 @APP.get("/pollution/")
 async def get_pollution(
-    source_lat: float, source_long: float, target_lat: float, target_long: float
+    source_lat: float,
+    source_long: float,
+    target_lat: float,
+    target_long: float,
+    avoid_box: List[str] = Query(None),
+    avoid_polygon: List[str] = Query(None),
+    encoding: Encoding = Encoding.json,
 ) -> List[Dict[str, str]]:
     """
     API route to get route from A to B.
@@ -227,9 +422,18 @@ async def get_pollution(
     sourceLong: longitude of the source point.
     targetLat: latitude of the target point.
     targetLong: longitude of the target point.
+    avoidBox: "west,south,east,north" of an area the route must not cross, repeatable.
+    avoidPolygon: "longitude,latitude,longitude,latitude,..." of an area the route
+        must not cross, repeatable.
+    encoding: json, polyline or array, see Encoding.
     """
     return return_a_star(
-        (source_lat, source_long), (target_lat, target_long), pollution
+        await region_graph((source_lat, source_long), (target_lat, target_long)),
+        (source_lat, source_long),
+        (target_lat, target_long),
+        "pollution",
+        avoid_areas(avoid_box, avoid_polygon),
+        encoding,
     )
 
 
@@ -240,6 +444,9 @@ async def get_linear_scalarisation(
     target_lat: float,
     target_long: float,
     weight: float,
+    avoid_box: List[str] = Query(None),
+    avoid_polygon: List[str] = Query(None),
+    encoding: Encoding = Encoding.json,
 ) -> List[Dict[str, str]]:
     """
     API route to get route from A to B.
@@ -247,21 +454,147 @@ async def get_linear_scalarisation(
     sourceLong: longitude of the source point.
     targetLat: latitude of the target point.
     targetLong: longitude of the target point.
+    avoidBox: "west,south,east,north" of an area the route must not cross, repeatable.
+    avoidPolygon: "longitude,latitude,longitude,latitude,..." of an area the route
+        must not cross, repeatable.
+    encoding: json, polyline or array, see Encoding.
     """
     return return_linear_scalarisation(
-        (source_lat, source_long), (target_lat, target_long), weight
+        await region_graph((source_lat, source_long), (target_lat, target_long)),
+        (source_lat, source_long),
+        (target_lat, target_long),
+        weight,
+        avoid_areas(avoid_box, avoid_polygon),
+        encoding,
     )
 
 
 @APP.get("/mospp/")
 async def get_mospp(
-    source_lat: float, source_long: float, target_lat: float, target_long: float
+    response: Response,
+    source_lat: float,
+    source_long: float,
+    target_lat: float,
+    target_long: float,
+    deadline: Optional[float] = None,
+    length_epsilon: Optional[float] = Query(None, ge=0),
+    pollution_epsilon: Optional[float] = Query(None, ge=0),
+    avoid_box: List[str] = Query(None),
+    avoid_polygon: List[str] = Query(None),
+    encoding: Encoding = Encoding.json,
+) -> List[List[Dict[str, str]]]:
+    """
+    API route to get the pareto set of routes from A to B.
+    sourceLat: latitude of the source point.
+    sourceLong: longitude of the source point.
+    targetLat: latitude of the target point.
+    targetLong: longitude of the target point.
+    deadline: seconds after which the routes found so far are returned.
+        The X-Pareto-Front-Complete header is false if the front is not exact.
+    lengthEpsilon, pollutionEpsilon: routes within a factor of 1 + epsilon of each
+        other at a vertex are treated as equal, so the front is approximated within
+        (1 + epsilon) ** k for routes of k edges, see mospp_epsilon.
+    avoidBox: "west,south,east,north" of an area the routes must not cross, repeatable.
+    avoidPolygon: "longitude,latitude,longitude,latitude,..." of an area the routes
+        must not cross, repeatable.
+    encoding: json, polyline or array, see Encoding. Compact encodings share
+        the vertices that routes start with.
+    """
+    front = return_mospp(
+        await region_graph((source_lat, source_long), (target_lat, target_long)),
+        (source_lat, source_long),
+        (target_lat, target_long),
+        deadline,
+        mospp_epsilon(length_epsilon, pollution_epsilon),
+        avoid_areas(avoid_box, avoid_polygon),
+        encoding,
+    )
+    response.headers["X-Pareto-Front-Complete"] = str(front.complete).lower()
+    return front.routes
+
+
+@APP.get("/mospp/stream/")
+async def get_mospp_stream(
+    source_lat: float,
+    source_long: float,
+    target_lat: float,
+    target_long: float,
+    deadline: Optional[float] = None,
+    length_epsilon: Optional[float] = Query(None, ge=0),
+    pollution_epsilon: Optional[float] = Query(None, ge=0),
+    avoid_box: List[str] = Query(None),
+    avoid_polygon: List[str] = Query(None),
+):
+    """
+    API route to stream improving pareto sets of routes from A to B as server-sent events.
+    sourceLat: latitude of the source point.
+    sourceLong: longitude of the source point.
+    targetLat: latitude of the target point.
+    targetLong: longitude of the target point.
+    deadline: seconds after which the routes found so far are the result.
+    lengthEpsilon, pollutionEpsilon: routes within a factor of 1 + epsilon of each
+        other at a vertex are treated as equal, so the front is approximated within
+        (1 + epsilon) ** k for routes of k edges, see mospp_epsilon.
+    avoidBox: "west,south,east,north" of an area the routes must not cross, repeatable.
+    avoidPolygon: "longitude,latitude,longitude,latitude,..." of an area the routes
+        must not cross, repeatable.
+    """
+    return StreamingResponse(
+        stream_mospp(
+            await region_graph((source_lat, source_long), (target_lat, target_long)),
+            (source_lat, source_long),
+            (target_lat, target_long),
+            deadline,
+            mospp_epsilon(length_epsilon, pollution_epsilon),
+            avoid_areas(avoid_box, avoid_polygon),
+        ),
+        media_type="text/event-stream",
+    )
+
+
+@APP.get("/constrained/")
+async def get_constrained(
+    source_lat: float,
+    source_long: float,
+    target_lat: float,
+    target_long: float,
+    max_detour: float = Query(0.2, ge=0),
+    avoid_box: List[str] = Query(None),
+    avoid_polygon: List[str] = Query(None),
+    encoding: Encoding = Encoding.json,
 ) -> List[Dict[str, str]]:
     """
-    API route to get route from A to B.
+    API route to get the least polluted route from A to B within a length budget.
     sourceLat: latitude of the source point.
     sourceLong: longitude of the source point.
     targetLat: latitude of the target point.
     targetLong: longitude of the target point.
+    maxDetour: fraction the route may be longer than the shortest route, e.g. 0.2.
+    avoidBox: "west,south,east,north" of an area the route must not cross, repeatable.
+    avoidPolygon: "longitude,latitude,longitude,latitude,..." of an area the route
+        must not cross, repeatable.
+    encoding: json, polyline or array, see Encoding.
+    """
+    return return_constrained(
+        await region_graph((source_lat, source_long), (target_lat, target_long)),
+        (source_lat, source_long),
+        (target_lat, target_long),
+        max_detour,
+        avoid_areas(avoid_box, avoid_polygon),
+        encoding,
+    )
+
+
+@APP.get("/tiles/{z}/{x}/{y}.png")
+async def get_tile(z: int, x: int, y: int):
+    """
+    API route to get one tile of the pollution overlay.
+    z: zoom level of the tile.
+    x: column of the tile.
+    y: row of the tile.
     """
-    return return_mospp((source_lat, source_long), (target_lat, target_long))
+    path = tile_path(TILES, z, x, y)
+    if not os.path.isfile(path):
+        # nothing to draw in this tile, the map caches the empty response too
+        return Response(status_code=204, headers=TILE_HEADERS)
+    return FileResponse(path, media_type="image/png", headers=TILE_HEADERS)
@@ -0,0 +1,35 @@
+"""Build a costed graph of a large area from a local OpenStreetMap extract, tile by tile, and store it in .gt format"""
+from typing import Optional
+import logging
+import typer
+from urbanroute.build import build_graph
+from urbanroute.queries import HexGridCache, HexGridQuery
+from cleanair.loggers import get_logger
+
+logger = get_logger("Building graph")
+logger.setLevel(logging.DEBUG)
+
+
+def main(
+    osm_file: str,
+    output: str,
+    secretfile: Optional[str] = None,
+    cache: str = "./cache",
+    instance_id: str = "d5e691ef9a1f2e86743f614806319d93e30709fe179dfb27e7b99b9b967c8737",
+    start_time: Optional[str] = "2020-01-24T09:00:00",
+    upto_time: Optional[str] = "2020-01-24T10:00:00",
+    tile_size: float = 0.02,
+    processes: Optional[int] = None,
+):
+    logger.info("Loading air pollution results")
+    # without a secretfile the results must already be in the cache
+    query = HexGridQuery(secretfile=secretfile) if secretfile else None
+    gdf = HexGridCache(cache, query).query_results(
+        instance_id, start_time=start_time, upto_time=upto_time
+    )
+    logger.info("Building graph from %s", osm_file)
+    build_graph(osm_file, gdf, output, tile_size=tile_size, processes=processes)
+
+
+if __name__ == "__main__":
+    typer.run(main)
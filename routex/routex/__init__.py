@@ -1,3 +1,12 @@
 """Routing algorithms."""
-from .astar import *
-from .mospp import *
+from .csr import *
+from .parallel import *
+
+try:
+    from .astar import *
+    from .mospp import *
+    from .constrained import *
+except ModuleNotFoundError as error:
+    # without graph-tool only the CSR algorithms are available
+    if error.name != "graph_tool":
+        raise
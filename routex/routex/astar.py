@@ -1,12 +1,7 @@
 """Perform A* on the graph"""
 from typing import Tuple
-from graph_tool.all import (
-    AStarVisitor,
-    astar_search,
-    StopSearch,
-    Graph,
-    EdgePropertyMap,
-)
+from graph_tool import Graph, EdgePropertyMap
+from graph_tool.search import AStarVisitor, astar_search, StopSearch
 import numpy as np
 
 
@@ -0,0 +1,123 @@
+"""Perform resource-constrained shortest path on the graph"""
+import heapq
+import itertools
+from typing import List, Optional
+import numpy as np
+from graph_tool import Graph, GraphView, Vertex, EdgePropertyMap
+from graph_tool.topology import shortest_distance
+from .mospp import Label
+
+
+def lower_bounds(G: Graph, target: int, edge_attribute: EdgePropertyMap) -> np.ndarray:
+    """
+    Exact cost from every vertex to the target, found with Dijkstra on the reversed graph.
+    Args:
+        G: graph
+        target: vertex the bounds are measured to
+        edge_attribute: the edge attribute that defines the cost of an edge
+    Returns: an array indexed by vertex, infinite where the target cannot be reached
+    """
+    dist = shortest_distance(
+        GraphView(G, reversed=True), source=target, weights=edge_attribute
+    )
+    return np.array(dist.a, dtype=float)
+
+
+def constrained_shortest_path(  # pylint: disable=too-many-arguments,too-many-locals
+    G: Graph,
+    source: int,
+    target: int,
+    cost: EdgePropertyMap,
+    resource: EdgePropertyMap,
+    budget: Optional[float] = None,
+    max_detour: Optional[float] = None,
+) -> List[Vertex]:
+    """
+    Find the least cost path whose total resource does not exceed a budget.
+    Labels are settled in order of cost plus the exact remaining cost to the target,
+    so the first target label settled is optimal. Labels whose resource plus the
+    remaining resource to the target exceeds the budget are never created.
+    Args:
+        G: graph
+        source: start vertex
+        target: end vertex (search terminates here)
+        cost: the edge attribute that is minimised, e.g. pollution
+        resource: the edge attribute that is constrained, e.g. length
+        budget: the largest total resource allowed on the path
+        max_detour: alternative to budget, the allowed fraction above the least
+            resource path, e.g. 0.2 for at most 20% longer
+    Returns: a list of vertices from the source to the target
+    """
+    cost_bound = lower_bounds(G, target, cost)
+    resource_bound = lower_bounds(G, target, resource)
+    if not np.isfinite(resource_bound[int(source)]):
+        raise Exception("The start is not connected to the target")
+    if budget is None:
+        if max_detour is None:
+            raise ValueError("Either budget or max_detour must be given")
+        budget = (1 + max_detour) * resource_bound[int(source)]
+    if resource_bound[int(source)] > budget:
+        raise Exception("No path from the start to the target is within the budget")
+
+    source = G.vertex(source)
+    target = G.vertex(target)
+    # break ties between equal priorities by resource, then by insertion order
+    counter = itertools.count()
+    start = Label(None, np.array([0.0, 0.0]), source)
+    labels = [(cost_bound[int(source)], 0.0, next(counter), start)]
+    # labels associated with each vertex
+    vertex_dict = {int(source): [start]}
+    while len(labels) != 0:
+        current = heapq.heappop(labels)[3]
+        if current.removed:
+            continue
+        if current.assoc == target:
+            break
+        for out_edge in current.assoc.out_edges():
+            v = int(out_edge.target())
+            new_resource = np.array(
+                [
+                    current.resource[0] + cost[out_edge],
+                    current.resource[1] + resource[out_edge],
+                ]
+            )
+            # prune labels that can no longer reach the target within the budget
+            if new_resource[1] + resource_bound[v] > budget:
+                continue
+            new_label = Label(current, new_resource, out_edge.target())
+            vertex_labels = vertex_dict.setdefault(v, [])
+            # an existing label that is at least as good makes the new one redundant
+            if any(
+                np.all(np.less_equal(vertex_label.resource, new_resource))
+                for vertex_label in vertex_labels
+            ):
+                continue
+            for vertex_label in vertex_labels:
+                if new_label.dominate(vertex_label):
+                    vertex_label.removed = True
+            vertex_labels[:] = [
+                vertex_label
+                for vertex_label in vertex_labels
+                if not vertex_label.removed
+            ]
+            vertex_labels.append(new_label)
+            heapq.heappush(
+                labels,
+                (
+                    new_resource[0] + cost_bound[v],
+                    new_resource[1],
+                    next(counter),
+                    new_label,
+                ),
+            )
+    else:
+        raise Exception("No path from the start to the target is within the budget")
+
+    # backtrack through the labels to the source
+    route = []
+    label_tracker = current
+    while label_tracker is not None:
+        route.append(label_tracker.assoc)
+        label_tracker = label_tracker.pred
+    route.reverse()
+    return route
@@ -0,0 +1,163 @@
+"""Shortest paths on graphs stored as compressed sparse row arrays, without graph-tool"""
+from typing import Dict, List, Sequence, Tuple, Union
+import numpy as np
+from scipy.sparse import csgraph, csr_matrix
+
+
+class CSRGraph:
+    """A directed graph as compressed sparse row arrays with a weight vector for
+    each cost, e.g. length and pollution.
+
+    The out edges of vertex v are edges indptr[v] to indptr[v + 1], whose targets
+    are indices[indptr[v]:indptr[v + 1]] and whose costs are the same slice of
+    each weight vector.
+    """
+
+    def __init__(
+        self, indptr: np.ndarray, indices: np.ndarray, weights: Dict[str, np.ndarray]
+    ):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.weights = {
+            name: np.asarray(weight, dtype=float) for name, weight in weights.items()
+        }
+        self.num_vertices = len(self.indptr) - 1
+        # scipy matrices of each weight, made on first use
+        self._matrices = {}
+
+    @classmethod
+    def from_edges(
+        cls,
+        num_vertices: int,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        weights: Dict[str, np.ndarray],
+    ) -> "CSRGraph":
+        """
+        Make a graph from lists of edges.
+        Args:
+            num_vertices: number of vertices, numbered from 0
+            sources, targets: the source and target vertex of each edge
+            weights: the cost of each edge for every weight name
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(num_vertices + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(sources, minlength=num_vertices))
+        return cls(
+            indptr,
+            np.asarray(targets, dtype=np.int64)[order],
+            {name: np.asarray(weight)[order] for name, weight in weights.items()},
+        )
+
+    @classmethod
+    def from_graph_tool(cls, G, edge_attributes: Dict[str, object]) -> "CSRGraph":
+        """
+        Copy the edges of a graph-tool graph, keeping the vertex indices.
+        Filtered out vertices and edges are left out.
+        Args:
+            G: graph-tool graph
+            edge_attributes: the edge property map of each weight name
+        """
+        names = list(edge_attributes)
+        edges = G.get_edges([edge_attributes[name] for name in names])
+        return cls.from_edges(
+            G.num_vertices(ignore_filter=True),
+            edges[:, 0].astype(np.int64),
+            edges[:, 1].astype(np.int64),
+            {name: edges[:, i + 2] for i, name in enumerate(names)},
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CSRGraph":
+        """Load a graph saved with save."""
+        with np.load(path) as arrays:
+            weights = {
+                name[len("weight_") :]: arrays[name]
+                for name in arrays.files
+                if name.startswith("weight_")
+            }
+            return cls(arrays["indptr"], arrays["indices"], weights)
+
+    def save(self, path: str) -> None:
+        """Save the arrays of the graph in .npz format."""
+        np.savez(
+            path,
+            indptr=self.indptr,
+            indices=self.indices,
+            **{"weight_" + name: weight for name, weight in self.weights.items()}
+        )
+
+    def num_edges(self) -> int:
+        """Number of edges in the graph."""
+        return len(self.indices)
+
+    def matrix(self, weight: str) -> csr_matrix:
+        """
+        Sparse adjacency matrix of a weight. Of any parallel edges only the cheapest
+        is kept, and edges of zero cost are kept as explicit zeros.
+        """
+        if weight not in self._matrices:
+            rows = np.repeat(np.arange(self.num_vertices), np.diff(self.indptr))
+            cost = self.weights[weight]
+            order = np.lexsort((cost, self.indices, rows))
+            rows, columns, cost = rows[order], self.indices[order], cost[order]
+            first = np.ones(len(rows), dtype=bool)
+            first[1:] = (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])
+            indptr = np.zeros(self.num_vertices + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum(
+                np.bincount(rows[first], minlength=self.num_vertices)
+            )
+            self._matrices[weight] = csr_matrix(
+                (cost[first], columns[first], indptr),
+                shape=(self.num_vertices, self.num_vertices),
+            )
+        return self._matrices[weight]
+
+
+def csr_dijkstra(
+    G: CSRGraph, sources: Union[int, Sequence[int]], weight: str, limit: float = np.inf,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Least cost from one or many sources to every vertex, all sources at once.
+    Args:
+        G: graph
+        sources: a start vertex, or a list of start vertices
+        weight: name of the weight that defines the cost of an edge
+        limit: vertices further than this from a source are left unreached
+    Returns: the cost and predecessor of every vertex, as vectors for one source or
+        a row for each source. As with graph-tool, the predecessor of a source or
+        an unreached vertex is itself, and unreached vertices have infinite cost.
+    """
+    dist, pred = csgraph.dijkstra(
+        G.matrix(weight), indices=sources, return_predecessors=True, limit=limit
+    )
+    pred = np.where(pred < 0, np.arange(G.num_vertices), pred).astype(np.int64)
+    return dist, pred
+
+
+def backtrack(pred: np.ndarray, source: int, target: int) -> List[int]:
+    """Follow the predecessors from the target back to the source.
+    Returns: a list of vertices from the source to the target"""
+    route = [target]
+    v = target
+    while v != source:
+        if v == pred[v]:
+            raise Exception("The start is not connected to the target")
+        v = int(pred[v])
+        route.append(v)
+    route.reverse()
+    return route
+
+
+def csr_shortest_path(G: CSRGraph, source: int, target: int, weight: str) -> List[int]:
+    """
+    Least cost path with Dijkstra.
+    Args:
+        G: graph
+        source: start vertex
+        target: end vertex
+        weight: name of the weight that defines the cost of an edge
+    Returns: a list of vertices from the source to the target
+    """
+    return backtrack(csr_dijkstra(G, source, weight)[1], source, target)
@@ -1,7 +1,9 @@
 """Perform MOSPP on the graph"""
 import heapq
+import time
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
 import numpy as np
-from graph_tool.all import Vertex, EdgePropertyMap
+from graph_tool import Vertex, EdgePropertyMap
 
 
 class Label:
@@ -27,19 +29,112 @@ class Label:
             np.less(self.resource, other.resource)
         )
 
+    def epsilon_dominate(self, other, factor: np.ndarray):
+        """Returns true iff this label is at most the other label in every resource
+        once both are rounded down to a power of factor, where factor is 1 + epsilon
+        for each resource. This label is then less than a factor times the other
+        label, and unlike comparing within a factor the relation is transitive, so a
+        label discarded for a label that is itself discarded later loses no more."""
+        return np.all(
+            np.less_equal(
+                _round_down(self.resource, factor), _round_down(other.resource, factor)
+            )
+        )
 
-def mospp(
-    source: Vertex, target: Vertex, cost_1: EdgePropertyMap, cost_2: EdgePropertyMap
-):
-    """Run MOSPP on graph. Returns list of routes, each route being a list of vertices"""
+
+def _round_down(resource, factor: np.ndarray) -> np.ndarray:
+    """Exponent of the largest power of factor at most each resource, or the
+    resource itself where the factor is 1, so an epsilon of 0 compares exactly."""
+    resource = np.asarray(resource, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exponent = np.floor(np.log(resource) / np.log(factor))
+    return np.where(factor == 1, resource, exponent)
+
+
+def hop_epsilon(epsilon: Sequence[float], hops: int) -> np.ndarray:
+    """
+    The epsilon to discard labels with at every vertex so that routes of at most
+    the given number of edges are approximated within a factor of 1 + epsilon.
+    Args:
+        epsilon: approximation of the front for each resource
+        hops: largest number of edges on a route, e.g. the number of vertices - 1
+    Returns: epsilon for each resource
+    """
+    return (1 + np.asarray(epsilon, dtype=float)) ** (1 / max(hops, 1)) - 1
+
+
+class ParetoFront(NamedTuple):
+    """Routes at the target that no other route found so far dominates.
+
+    Attributes:
+        routes: list of routes, each route being a list of vertices
+        complete: true iff the search finished, so that the front is exact
+        costs: the two costs of each route along the edges the search took, which
+            the vertices alone do not give where there are parallel edges
+    """
+
+    routes: List[List[Vertex]]
+    complete: bool
+    costs: Optional[List[Tuple[float, float]]] = None
+
+
+def mospp_fronts(  # pylint: disable=too-many-arguments
+    source: Vertex,
+    target: Vertex,
+    cost_1: EdgePropertyMap,
+    cost_2: EdgePropertyMap,
+    deadline: Optional[float] = None,
+    partial: bool = True,
+    epsilon: Optional[Sequence[float]] = None,
+) -> Iterator[ParetoFront]:
+    """
+    Run MOSPP on graph, yielding the front found so far as the search progresses.
+    Args:
+        source: start vertex
+        target: end vertex
+        cost_1, cost_2: the edge attributes that define the two costs of an edge
+        deadline: seconds after which the search stops and the front found so far
+            is yielded as incomplete, unlimited if None. This front has every route
+            to the target found so far that no other dominates, settled or not.
+        partial: if true, yield an incomplete front of the settled target labels each
+            time a target label is settled. No later label dominates a settled label,
+            so without epsilon each of these fronts is part of the final front.
+        epsilon: if given, labels at the same vertex that are within a factor of
+            1 + epsilon of each other in each resource are merged: a new label is
+            discarded if a label at its vertex epsilon dominates it, otherwise the
+            labels it epsilon dominates are removed, see Label.epsilon_dominate.
+            Routes lose at most this factor at each vertex, so a route of k edges is
+            approximated within (1 + epsilon) ** k; use hop_epsilon for a bound on
+            the whole route.
+    Returns: an iterator of fronts, the last of which is complete unless the deadline passed
+    """
+    if epsilon is None:
+        dominate = Label.dominate
+    else:
+        factor = 1 + np.asarray(epsilon, dtype=float)
+
+        def dominate(label, other):
+            return label.epsilon_dominate(other, factor)
+
+    stop = None if deadline is None else time.monotonic() + deadline
     labels = [Label(None, np.array([0, 0]), source)]
     # labels associated with each vertex
     vertex_dict = {}
+    # labels at the target that have been popped from the heap, in order
+    settled = []
     while len(labels) != 0:
+        if stop is not None and time.monotonic() > stop:
+            yield _front(vertex_dict.get(target, []), source, False)
+            return
         # pick lexicographically smallest label if it isn't
         # already excluded
         current = heapq.heappop(labels)
         if not current.removed:
+            if partial and current.assoc == target:
+                settled.append(current)
+                # with epsilon a settled label may be removed by a later label
+                settled = [label for label in settled if not label.removed]
+                yield _front(settled, source, False)
             for out_edge in current.assoc.out_edges():
                 # create the new label with updated resource values
                 new_label = Label(
@@ -54,7 +149,7 @@ def mospp(
                 if out_edge.target() in vertex_dict:
                     # check if the new label is dominated
                     for vertex_label in vertex_dict[out_edge.target()]:
-                        if vertex_label.dominate(new_label):
+                        if dominate(vertex_label, new_label):
                             break
                     else:
                         # keep the new label as it is not dominated
@@ -62,7 +157,9 @@ def mospp(
                         heapq.heappush(labels, new_label)
                         # remove labels that the new label dominates from the heap
                         for vertex_label in vertex_dict[out_edge.target()]:
-                            if new_label.dominate(vertex_label):
+                            if vertex_label is not new_label and dominate(
+                                new_label, vertex_label
+                            ):
                                 vertex_label.removed = True
                         # remove such labels from association with their vertex
                         vertex_dict[out_edge.target()][:] = [
@@ -74,12 +171,28 @@ def mospp(
                     # no labels for this vertex yet, add the new label
                     vertex_dict[out_edge.target()] = [new_label]
                     heapq.heappush(labels, new_label)
-    # begin backtracking
+    yield _front(vertex_dict.get(target, []), source, True)
+
+
+def _front(target_labels: List[Label], source: Vertex, complete: bool) -> ParetoFront:
+    """The routes of the labels at the target and their costs."""
+    return ParetoFront(
+        _backtrack(target_labels, source),
+        complete,
+        [
+            (float(label.resource[0]), float(label.resource[1]))
+            for label in target_labels
+        ],
+    )
+
+
+def _backtrack(target_labels: List[Label], source: Vertex) -> List[List[Vertex]]:
+    """Follow the predecessors of each label at the target back to the source."""
     routes = []
     route = []
-    for label in vertex_dict[target]:
-        route.append(target)
-        v = target
+    for label in target_labels:
+        v = label.assoc
+        route.append(v)
         # keep track of our current label
         label_tracker = label
         while v != source:
@@ -90,3 +203,30 @@ def mospp(
         routes.append(route)
         route = []
     return routes
+
+
+def mospp(
+    source: Vertex,
+    target: Vertex,
+    cost_1: EdgePropertyMap,
+    cost_2: EdgePropertyMap,
+    deadline: Optional[float] = None,
+    epsilon: Optional[Sequence[float]] = None,
+):
+    """Run MOSPP on graph. Returns list of routes, each route being a list of vertices.
+    If a deadline in seconds is given, the routes may only approximate the front;
+    use mospp_fronts to know whether the search finished. If epsilon is given for
+    each resource, labels within a factor of 1 + epsilon of another label at the
+    same vertex are discarded, see mospp_fronts."""
+    front = None
+    for front in mospp_fronts(
+        source,
+        target,
+        cost_1,
+        cost_2,
+        deadline=deadline,
+        partial=False,
+        epsilon=epsilon,
+    ):
+        pass
+    return front.routes
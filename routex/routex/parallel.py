@@ -0,0 +1,267 @@
+"""Perform MOSPP on CSR arrays, merging the labels of many vertices at once across processes"""
+import os
+from multiprocessing import Pool
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import numpy as np
+from .csr import CSRGraph
+
+
+def pareto_minimal(
+    resources: np.ndarray, groups: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Which labels no other label of the same group dominates.
+    Args:
+        resources: nx2 matrix of the two resources of each label
+        groups: group of each label, e.g. its vertex, all in one group if None
+    Returns: true for each label that is not dominated, labels with the same
+        resources do not dominate each other
+    """
+    if groups is None:
+        groups = np.zeros(len(resources), dtype=np.int64)
+    order = np.lexsort((resources[:, 1], resources[:, 0], groups))
+    group, first, second = groups[order], resources[order, 0], resources[order, 1]
+    # a label is dominated iff a lexicographically smaller label of its group has at
+    # most its second resource, so compare with the smallest second resource before it
+    new_key = np.ones(len(order), dtype=bool)
+    new_key[1:] = (
+        (group[1:] != group[:-1])
+        | (first[1:] != first[:-1])
+        | (second[1:] != second[:-1])
+    )
+    starts = np.maximum.accumulate(np.where(new_key, np.arange(len(order)), 0))
+    # rank the second resources and offset the ranks of each group below those of
+    # the groups before it, so that a running minimum never looks at another group
+    _, rank = np.unique(second, return_inverse=True)
+    _, group_index = np.unique(group, return_inverse=True)
+    shifted = rank.ravel() - group_index.ravel() * (len(order) + 1)
+    smallest = np.concatenate(
+        [[np.iinfo(np.int64).max], np.minimum.accumulate(shifted)]
+    )[starts]
+    minimal = np.empty(len(order), dtype=bool)
+    minimal[order] = shifted < smallest
+    return minimal
+
+
+def expand_labels(  # pylint: disable=too-many-arguments
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    cost_1: np.ndarray,
+    cost_2: np.ndarray,
+    vertices: np.ndarray,
+    resources: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    New labels along every out edge of the given labels.
+    Args:
+        indptr, indices, cost_1, cost_2: arrays of the graph, see CSRGraph
+        vertices: vertex of each label
+        resources: nx2 matrix of the resources of each label
+    Returns: the vertex, resources and index of the expanded label of each new label
+    """
+    counts = indptr[vertices + 1] - indptr[vertices]
+    parents = np.repeat(np.arange(len(vertices)), counts)
+    # the out edges of each label follow on from those of the label before
+    first_edge = indptr[vertices] - np.cumsum(counts) + counts
+    edges = np.repeat(first_edge, counts) + np.arange(counts.sum())
+    new_resources = np.column_stack(
+        [resources[parents, 0] + cost_1[edges], resources[parents, 1] + cost_2[edges]]
+    )
+    return indices[edges], new_resources, parents
+
+
+class _Labels:
+    """The vertex, resources, predecessor label and whether each label is still
+    kept, in arrays that double in size when full so adding labels is cheap."""
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.vertex = np.empty(capacity, dtype=np.int64)
+        self.resource = np.empty((capacity, 2))
+        self.pred = np.empty(capacity, dtype=np.int64)
+        self.alive = np.empty(capacity, dtype=bool)
+
+    def append(
+        self, vertex: np.ndarray, resource: np.ndarray, pred: np.ndarray
+    ) -> np.ndarray:
+        """Add kept labels, returning their indices."""
+        end = self.size + len(vertex)
+        if end > len(self.vertex):
+            capacity = max(end, 2 * len(self.vertex))
+            for name in ("vertex", "resource", "pred", "alive"):
+                old = getattr(self, name)
+                new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+                new[: self.size] = old[: self.size]
+                setattr(self, name, new)
+        self.vertex[self.size : end] = vertex
+        self.resource[self.size : end] = resource
+        self.pred[self.size : end] = pred
+        self.alive[self.size : end] = True
+        labels = np.arange(self.size, end)
+        self.size = end
+        return labels
+
+
+def _merge_worker(task: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    vertices, resources = task
+    return pareto_minimal(resources, vertices)
+
+
+def parallel_mospp(  # pylint: disable=too-many-arguments
+    G: CSRGraph,
+    source: int,
+    target: int,
+    cost_1: str = "length",
+    cost_2: str = "pollution",
+    processes: Optional[int] = None,
+    pool: Optional[Pool] = None,
+    min_parallel_labels: int = 10000,
+    with_costs: bool = False,
+) -> Union[List[List[int]], Tuple[List[List[int]], List[Tuple[float, float]]]]:
+    """
+    Run MOSPP on a CSR graph in rounds. Each round expands every open label that no
+    other open label dominates, as none of them can be dominated by a later label.
+    The new labels are then merged with the labels at the vertices they reach,
+    a partition of the vertices per process, so the front is the same as the one
+    found by mospp.
+    Args:
+        G: graph
+        source: start vertex
+        target: end vertex
+        cost_1, cost_2: names of the weights that define the two costs of an edge
+        processes: number of worker processes, defaults to the number of cpus.
+            Each round merges this many partitions of the vertices. With 1 and no
+            pool every round runs in this process.
+        pool: worker processes to reuse across searches, e.g. one per server,
+            otherwise a pool is made for this search
+        min_parallel_labels: rounds merging fewer labels than this run in this
+            process, as sending them to the pool would take longer
+        with_costs: if true, also return the two costs of each route along the
+            edges the search took, which the vertices alone do not give where
+            there are parallel edges
+    Returns: list of routes, each route being a list of vertices from the source to
+        the target, in the order their labels reached the target. Labels reaching
+        the target in the same round are in the order of their predecessors, so
+        the order may differ from mospp's. With with_costs, the routes and a list
+        of the (cost_1, cost_2) of each route.
+    """
+    arrays = (G.indptr, G.indices, G.weights[cost_1], G.weights[cost_2])
+    parts = processes or os.cpu_count()
+    if pool is not None:
+        routes, costs = _label_rounds(
+            arrays, pool.map, parts, min_parallel_labels, source, target
+        )
+    elif processes == 1:
+        routes, costs = _label_rounds(
+            arrays, None, 1, min_parallel_labels, source, target
+        )
+    else:
+        with Pool(processes) as new_pool:
+            routes, costs = _label_rounds(
+                arrays, new_pool.map, parts, min_parallel_labels, source, target
+            )
+    return (routes, costs) if with_costs else routes
+
+
+def _partitions(ends: np.ndarray, parts: int) -> List[slice]:
+    """
+    Split consecutive groups into at most the given number of slices of about the
+    same size, keeping each group in one slice.
+    Args:
+        ends: the position after the last item of each group
+        parts: number of slices
+    """
+    cuts = ends[np.searchsorted(ends, ends[-1] * np.arange(1, parts) / parts)]
+    bounds = np.unique(np.concatenate([[0], cuts, ends[-1:]]))
+    return [slice(start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _label_rounds(  # pylint: disable=too-many-arguments,too-many-locals
+    arrays: Tuple[np.ndarray, ...],
+    pool_map: Optional[Callable],
+    parts: int,
+    min_parallel_labels: int,
+    source: int,
+    target: int,
+) -> Tuple[List[List[int]], List[Tuple[float, float]]]:
+    """Label-setting rounds of parallel_mospp, with pool_map merging the partitions,
+    returning the routes and their costs."""
+    empty = np.empty(0, dtype=np.int64)
+    labels = _Labels()
+    open_labels = labels.append(np.array([source]), np.zeros((1, 2)), np.array([-1]))
+    # labels at each vertex in the order they were added; as in mospp the source
+    # label is not among them
+    vertex_labels: Dict[int, np.ndarray] = {}
+    while len(open_labels) != 0:
+        minimal = pareto_minimal(labels.resource[open_labels])
+        selected = open_labels[minimal]
+        open_labels = open_labels[~minimal]
+
+        new_vertex, new_resource, parents = expand_labels(
+            *arrays, labels.vertex[selected], labels.resource[selected]
+        )
+        if len(new_vertex) == 0:
+            continue
+        new_pred = selected[parents]
+
+        # the labels at each vertex reached, those already there before the new ones,
+        # with new labels numbered -1, -2, ... until they are kept
+        touched, new_counts = np.unique(new_vertex, return_counts=True)
+        existing = [vertex_labels.get(v, empty) for v in touched.tolist()]
+        candidates = np.concatenate(
+            [empty] + existing + [-1 - np.arange(len(new_vertex))]
+        )
+        known = candidates[candidates >= 0]
+        vertices = np.concatenate([labels.vertex[known], new_vertex])
+        resources = np.concatenate([labels.resource[known], new_resource])
+        grouped = np.argsort(vertices, kind="stable")
+        candidates, vertices = candidates[grouped], vertices[grouped]
+        resources = resources[grouped]
+
+        # merge whole vertices at a time, across the pool if there are enough labels
+        ends = np.cumsum(new_counts + [len(before) for before in existing])
+        if pool_map is None or len(candidates) < min_parallel_labels:
+            keep = pareto_minimal(resources, vertices)
+        else:
+            keep = np.concatenate(
+                pool_map(
+                    _merge_worker,
+                    [
+                        (vertices[part], resources[part])
+                        for part in _partitions(ends, parts)
+                    ],
+                )
+            )
+
+        # labels that a new label dominates are never expanded
+        dropped = candidates[~keep]
+        labels.alive[dropped[dropped >= 0]] = False
+        kept = candidates[keep]
+        new_kept = -1 - kept[kept < 0]
+        new_labels = labels.append(
+            new_vertex[new_kept], new_resource[new_kept], new_pred[new_kept]
+        )
+        kept[kept < 0] = new_labels
+        counts = np.bincount(
+            np.searchsorted(touched, vertices[keep]), minlength=len(touched)
+        )
+        vertex_labels.update(
+            zip(touched.tolist(), np.split(kept, np.cumsum(counts)[:-1]))
+        )
+        open_labels = np.concatenate(
+            [open_labels[labels.alive[open_labels]], new_labels]
+        )
+
+    # follow the predecessors of each label at the target back to the source
+    routes = []
+    target_labels = vertex_labels.get(target, empty)
+    for label in target_labels:
+        route = [target]
+        v = target
+        while v != source:
+            label = labels.pred[label]
+            v = int(labels.vertex[label])
+            route.append(v)
+        route.reverse()
+        routes.append(route)
+    return routes, [tuple(costs) for costs in labels.resource[target_labels].tolist()]
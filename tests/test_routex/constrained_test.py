@@ -0,0 +1,45 @@
+import pytest
+from graph_tool.all import Graph
+from routex import constrained_shortest_path
+
+
+def small_graph():
+    G = Graph()
+    G.add_vertex(5)
+    length = G.new_edge_property("double")
+    pollution = G.new_edge_property("double")
+    # (source, target, length, pollution)
+    for u, v, l, p in [
+        (1, 4, 1, 5),
+        (1, 3, 1, 1),
+        (3, 4, 1, 1),
+        (1, 2, 3, 0),
+        (2, 4, 3, 0),
+    ]:
+        e = G.add_edge(u, v)
+        length[e] = l
+        pollution[e] = p
+    return G, length, pollution
+
+
+@pytest.mark.parametrize(
+    "budget, expected", [(1, [1, 4]), (2, [1, 3, 4]), (5, [1, 3, 4]), (6, [1, 2, 4])]
+)
+def test_constrained_budget(budget, expected):
+    G, length, pollution = small_graph()
+    route = constrained_shortest_path(G, 1, 4, pollution, length, budget=budget)
+    assert [G.vertex_index[r] for r in route] == expected
+
+
+def test_constrained_max_detour():
+    G, length, pollution = small_graph()
+    route = constrained_shortest_path(G, 1, 4, pollution, length, max_detour=1.0)
+    assert [G.vertex_index[r] for r in route] == [1, 3, 4]
+
+
+def test_constrained_infeasible():
+    G, length, pollution = small_graph()
+    with pytest.raises(Exception):
+        constrained_shortest_path(G, 1, 4, pollution, length, budget=0.5)
+    with pytest.raises(Exception):
+        constrained_shortest_path(G, 1, 0, pollution, length, budget=10)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from routex import CSRGraph, csr_dijkstra, csr_shortest_path
+
+
+def small_graph():
+    # (source, target, length, pollution)
+    edges = np.array(
+        [
+            (1, 4, 1, 5),
+            (1, 3, 1, 1),
+            (3, 4, 1, 1),
+            (1, 2, 3, 0),
+            (2, 4, 3, 0),
+            # a parallel edge that is cheaper in pollution only
+            (1, 3, 2, 0),
+        ],
+        dtype=float,
+    )
+    return CSRGraph.from_edges(
+        6,
+        edges[:, 0].astype(int),
+        edges[:, 1].astype(int),
+        {"length": edges[:, 2], "pollution": edges[:, 3]},
+    )
+
+
+def test_csr_shortest_path():
+    G = small_graph()
+    assert G.num_edges() == 6
+    assert csr_shortest_path(G, 1, 4, "length") == [1, 4]
+    assert csr_shortest_path(G, 1, 4, "pollution") == [1, 2, 4]
+    with pytest.raises(Exception):
+        csr_shortest_path(G, 4, 1, "length")
+
+
+def test_csr_dijkstra_batched():
+    G = small_graph()
+    dist, pred = csr_dijkstra(G, [1, 3], "pollution")
+    assert dist.shape == pred.shape == (2, 6)
+    assert dist[0].tolist() == [np.inf, 0, 0, 0, 0, np.inf]
+    assert dist[1].tolist() == [np.inf, np.inf, np.inf, 0, 1, np.inf]
+    # sources and unreached vertices are their own predecessor
+    assert pred[0].tolist() == [0, 1, 1, 1, 2, 5]
+    assert pred[1].tolist() == [0, 1, 2, 3, 3, 5]
+
+
+def test_csr_dijkstra_matches_single_source():
+    rng = np.random.default_rng(0)
+    n = 200
+    sources = rng.integers(0, n, 1000)
+    targets = rng.integers(0, n, 1000)
+    G = CSRGraph.from_edges(n, sources, targets, {"length": rng.uniform(0, 10, 1000)})
+    dist, _ = csr_dijkstra(G, np.arange(10), "length")
+    for source in range(10):
+        single, pred = csr_dijkstra(G, source, "length")
+        assert dist[source] == pytest.approx(single)
+        reached = np.flatnonzero(np.isfinite(single))
+        # the predecessor of every reached vertex is on a least cost path to it
+        for v in reached[reached != source]:
+            assert single[pred[v]] <= single[v]
+
+
+def test_csr_save_load(tmp_path):
+    G = small_graph()
+    G.save(tmp_path / "graph.npz")
+    loaded = CSRGraph.load(tmp_path / "graph.npz")
+    assert loaded.indptr.tolist() == G.indptr.tolist()
+    assert loaded.indices.tolist() == G.indices.tolist()
+    assert set(loaded.weights) == {"length", "pollution"}
+    assert csr_shortest_path(loaded, 1, 4, "pollution") == [1, 2, 4]
+
+
+def test_csr_from_graph_tool():
+    gt = pytest.importorskip("graph_tool.all")
+    G = gt.Graph()
+    G.add_vertex(5)
+    length = G.new_edge_property("double")
+    for u, v, l in [(1, 4, 5), (1, 3, 1), (3, 4, 1)]:
+        length[G.add_edge(u, v)] = l
+    csr = CSRGraph.from_graph_tool(G, {"length": length})
+    assert csr.num_vertices == 5
+    assert csr_shortest_path(csr, 1, 4, "length") == [1, 3, 4]
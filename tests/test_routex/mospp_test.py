@@ -1,7 +1,7 @@
 import pytest
 import json
 from graph_tool.all import load_graph, Graph
-from routex import mospp
+from routex import mospp, mospp_fronts, hop_epsilon
 
 with open("./tests/test_routex/large_solution.json", "r") as read_file:
     data = json.load(read_file)
@@ -47,7 +47,7 @@ def test_mospp_large():
     ] == solution
 
 
-def test_mospp_small():
+def small_graph():
     G = Graph()
     G.add_vertex(1)
     G.add_vertex(2)
@@ -70,7 +70,131 @@ def test_mospp_small():
     c2[e3] = 1
     c2[e4] = 1
     c2[e5] = 0
+    return G, c1, c2
+
+
+def test_mospp_small():
+    G, c1, c2 = small_graph()
     assert [
         [G.vertex_index[r] for r in route]
         for route in mospp(G.vertex(1), G.vertex(4), c1, c2)
     ] == [[1, 4], [1, 2, 4]]
+
+
+def test_mospp_fronts():
+    G, c1, c2 = small_graph()
+    fronts = list(mospp_fronts(G.vertex(1), G.vertex(4), c1, c2))
+    assert [front.complete for front in fronts] == [False] * (len(fronts) - 1) + [True]
+    assert [[G.vertex_index[r] for r in route] for route in fronts[-1].routes] == [
+        [1, 4],
+        [1, 2, 4],
+    ]
+
+
+def test_mospp_deadline():
+    G, c1, c2 = small_graph()
+    fronts = list(mospp_fronts(G.vertex(1), G.vertex(4), c1, c2, deadline=-1))
+    assert len(fronts) == 1
+    assert not fronts[0].complete
+    assert mospp(G.vertex(1), G.vertex(4), c1, c2, deadline=-1) == []
+
+
+def test_mospp_epsilon():
+    G = Graph()
+    G.add_vertex(5)
+    c1 = G.new_edge_property("double")
+    c2 = G.new_edge_property("double")
+    # three routes from 0 to 4 costing (10, 10), (10.5, 9.8) and (20, 0)
+    for u, v, cost_1, cost_2 in [
+        (0, 1, 5, 5),
+        (1, 4, 5, 5),
+        (0, 2, 5, 4.8),
+        (2, 4, 5.5, 5),
+        (0, 3, 10, 0),
+        (3, 4, 10, 0),
+    ]:
+        e = G.add_edge(u, v)
+        c1[e] = cost_1
+        c2[e] = cost_2
+    assert len(mospp(G.vertex(0), G.vertex(4), c1, c2)) == 3
+    routes = mospp(G.vertex(0), G.vertex(4), c1, c2, epsilon=(0.1, 0.1))
+    assert len(routes) == 2
+    assert [G.vertex_index[r] for r in routes[-1]] == [0, 3, 4]
+
+
+def test_hop_epsilon():
+    epsilon = hop_epsilon([0.1, 0.01], 20)
+    assert (1 + epsilon) ** 20 == pytest.approx([1.1, 1.01])
+
+
+def test_mospp_partial_fronts_are_settled():
+    G = Graph()
+    G.add_vertex(3)
+    c1 = G.new_edge_property("double")
+    c2 = G.new_edge_property("double")
+    # the direct route costing (4, 4) reaches the target before the route through
+    # vertex 1 that dominates it, but is never settled
+    for u, v, cost_1, cost_2 in [
+        (0, 2, 1, 5),
+        (0, 2, 4, 4),
+        (0, 1, 2, 2),
+        (1, 2, 1, 1),
+    ]:
+        e = G.add_edge(u, v)
+        c1[e] = cost_1
+        c2[e] = cost_2
+    fronts = [
+        [[G.vertex_index[r] for r in route] for route in front.routes]
+        for front in mospp_fronts(G.vertex(0), G.vertex(2), c1, c2)
+    ]
+    assert fronts == [[[0, 2]], [[0, 2], [0, 1, 2]], [[0, 2], [0, 1, 2]]]
+
+
+def test_mospp_epsilon_removes_existing_labels():
+    G = Graph()
+    G.add_vertex(3)
+    c1 = G.new_edge_property("double")
+    c2 = G.new_edge_property("double")
+    # the direct route costing (10, 12) reaches the target first, and the route
+    # through vertex 1 costing (10.5, 9) is within 10% of it
+    for u, v, cost_1, cost_2 in [(0, 2, 10, 12), (0, 1, 5, 4.5), (1, 2, 5.5, 4.5)]:
+        e = G.add_edge(u, v)
+        c1[e] = cost_1
+        c2[e] = cost_2
+    assert len(mospp(G.vertex(0), G.vertex(2), c1, c2)) == 2
+    routes = mospp(G.vertex(0), G.vertex(2), c1, c2, epsilon=(0.1, 0.1))
+    assert [[G.vertex_index[r] for r in route] for route in routes] == [[0, 1, 2]]
+
+
+def test_mospp_epsilon_of_zero_is_exact():
+    G = Graph()
+    G.add_vertex(3)
+    c1 = G.new_edge_property("double")
+    c2 = G.new_edge_property("double")
+    # the direct route costs (5000, 10) and the route through vertex 1 (50, 10.5),
+    # so they are within 10% in the second cost only and the shorter one must stay
+    for u, v, cost_1, cost_2 in [(0, 2, 5000, 10), (0, 1, 25, 5), (1, 2, 25, 5.5)]:
+        e = G.add_edge(u, v)
+        c1[e] = cost_1
+        c2[e] = cost_2
+    for epsilon in [(0.0, 0.1), (0.1, 0.0), (0.01, 0.1)]:
+        routes = mospp(G.vertex(0), G.vertex(2), c1, c2, epsilon=epsilon)
+        assert [0, 1, 2] in [[G.vertex_index[r] for r in route] for route in routes]
+
+
+def test_mospp_front_costs_of_parallel_edges():
+    G = Graph()
+    G.add_vertex(3)
+    c1 = G.new_edge_property("double")
+    c2 = G.new_edge_property("double")
+    # two parallel edges from vertex 1 give two routes with the same vertices
+    for u, v, cost_1, cost_2 in [(0, 1, 1, 1), (1, 2, 2, 8), (1, 2, 8, 2)]:
+        e = G.add_edge(u, v)
+        c1[e] = cost_1
+        c2[e] = cost_2
+    front = list(mospp_fronts(G.vertex(0), G.vertex(2), c1, c2, partial=False))[-1]
+    assert [[G.vertex_index[r] for r in route] for route in front.routes] == [
+        [0, 1, 2],
+        [0, 1, 2],
+    ]
+    assert front.costs == [(3, 9), (9, 3)]
@@ -0,0 +1,103 @@
+from multiprocessing import Pool
+import numpy as np
+import pytest
+from graph_tool.all import Graph
+from routex import CSRGraph, mospp, parallel_mospp, pareto_minimal
+
+
+def test_pareto_minimal():
+    resources = np.array(
+        [[1, 5], [2, 2], [1, 5], [3, 1], [2, 3], [0, 9], [3, 3]], dtype=float
+    )
+    # labels with the same resources do not dominate each other
+    assert pareto_minimal(resources).tolist() == [
+        True,
+        True,
+        True,
+        True,
+        False,
+        True,
+        False,
+    ]
+
+
+def random_graph(seed, n=30, m=120):
+    rng = np.random.default_rng(seed)
+    sources = rng.integers(0, n, m)
+    targets = rng.integers(0, n, m)
+    loops = sources == targets
+    sources, targets = sources[~loops], targets[~loops]
+    length = rng.integers(1, 10, len(sources)).astype(float)
+    # pollution trades off against length so that fronts have several routes
+    pollution = 10 - length + rng.integers(0, 3, len(sources))
+    G = Graph()
+    G.add_vertex(n)
+    length_property = G.new_edge_property("double")
+    pollution_property = G.new_edge_property("double")
+    for u, v, l, p in zip(sources, targets, length, pollution):
+        e = G.add_edge(u, v)
+        length_property[e] = l
+        pollution_property[e] = p
+    csr = CSRGraph.from_edges(
+        n, sources, targets, {"length": length, "pollution": pollution}
+    )
+    return G, length_property, pollution_property, csr
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+@pytest.mark.parametrize("seed", range(5))
+def test_parallel_mospp_matches_mospp(seed, processes):
+    G, length, pollution, csr = random_graph(seed)
+    n = G.num_vertices()
+    expected = sorted(
+        [int(v) for v in route]
+        for route in mospp(G.vertex(0), G.vertex(n - 1), length, pollution)
+    )
+    routes = parallel_mospp(csr, 0, n - 1, processes=processes, min_parallel_labels=0)
+    assert sorted(routes) == expected
+
+
+def test_pareto_minimal_groups():
+    resources = np.array(
+        [[1, 5], [2, 2], [3, 1], [2, 6], [0, 9], [2.5, 2.5]], dtype=float
+    )
+    groups = np.array([7, 3, 7, 7, 3, 7])
+    # labels are only compared within their group, so [2.5, 2.5] is kept
+    assert pareto_minimal(resources, groups).tolist() == [
+        True,
+        True,
+        True,
+        False,
+        True,
+        True,
+    ]
+
+
+def test_parallel_mospp_reuses_pool():
+    with Pool(2) as pool:
+        for seed in range(3):
+            G, length, pollution, csr = random_graph(seed)
+            n = G.num_vertices()
+            routes = parallel_mospp(
+                csr, 0, n - 1, processes=2, pool=pool, min_parallel_labels=0
+            )
+            # routes are in the order they reached the target, so in the same
+            # order whether or not the merges run in the pool
+            assert routes == parallel_mospp(csr, 0, n - 1, processes=1)
+            assert sorted(routes) == sorted(
+                [int(v) for v in route]
+                for route in mospp(G.vertex(0), G.vertex(n - 1), length, pollution)
+            )
+
+
+def test_parallel_mospp_costs_of_parallel_edges():
+    # two parallel edges from vertex 1 give two routes with the same vertices
+    csr = CSRGraph.from_edges(
+        3,
+        np.array([0, 1, 1]),
+        np.array([1, 2, 2]),
+        {"length": np.array([1.0, 2.0, 8.0]), "pollution": np.array([1.0, 8.0, 2.0])},
+    )
+    routes, costs = parallel_mospp(csr, 0, 2, processes=1, with_costs=True)
+    assert routes == [[0, 1, 2], [0, 1, 2]]
+    assert sorted(costs) == [(3, 9), (9, 3)]
@@ -0,0 +1,106 @@
+"""Tests for the spatial grid and the edges crossing areas to avoid."""
+
+import numpy as np
+import pytest
+from urbanroute.geospatial import (
+    SpatialGrid,
+    edges_in_areas,
+    parse_box,
+    parse_linestring,
+    parse_polygon,
+)
+from urbanroute.geospatial.avoid_areas import segments_cross_polygon
+
+
+def random_segments(n=500, seed=0):
+    """Short segments scattered over central London."""
+    rng = np.random.default_rng(seed)
+    start = rng.uniform([-0.14, 51.49], [-0.10, 51.52], (n, 2))
+    end = start + rng.uniform(-0.003, 0.003, (n, 2))
+    return np.column_stack([start, end])
+
+
+def segment_bounds(segments):
+    """West, south, east, north of each segment."""
+    return np.column_stack(
+        [
+            np.minimum(segments[:, 0], segments[:, 2]),
+            np.minimum(segments[:, 1], segments[:, 3]),
+            np.maximum(segments[:, 0], segments[:, 2]),
+            np.maximum(segments[:, 1], segments[:, 3]),
+        ]
+    )
+
+
+def test_grid_query_finds_overlapping_items():
+    """Every item whose bounds overlap the query is found, without duplicates."""
+    bounds = segment_bounds(random_segments())
+    grid = SpatialGrid(bounds, cell_size=0.002)
+    west, south, east, north = -0.125, 51.50, -0.115, 51.505
+    found = grid.query(west, south, east, north)
+    overlapping = np.flatnonzero(
+        (bounds[:, 0] <= east)
+        & (bounds[:, 2] >= west)
+        & (bounds[:, 1] <= north)
+        & (bounds[:, 3] >= south)
+    )
+    assert set(overlapping) <= set(found)
+    assert len(found) == len(set(found))
+    # the grid only looks at the cells near the query
+    assert len(found) < len(bounds) / 4
+    assert len(grid.query(1.0, 52.0, 1.1, 52.1)) == 0
+
+
+def test_segments_cross_polygon():
+    """Segments crossing, inside, touching and outside a triangle."""
+    triangle = np.array([[0.0, 0.0], [4.0, 0.0], [0.0, 4.0]])
+    segments = np.array(
+        [
+            [-1.0, 1.0, 5.0, 1.0],  # crosses two sides
+            [0.5, 0.5, 1.0, 1.0],  # inside
+            [2.0, 2.0, 3.0, 3.0],  # touches the hypotenuse
+            [3.0, 3.0, 4.0, 4.0],  # outside, beyond the hypotenuse
+            [5.0, 0.0, 6.0, 0.0],  # collinear with a side but beyond it
+        ]
+    )
+    assert segments_cross_polygon(segments, triangle).tolist() == [
+        True,
+        True,
+        True,
+        False,
+        False,
+    ]
+
+
+def test_edges_in_areas_matches_scan():
+    """The grid finds the same edges as testing every edge."""
+    segments = random_segments(seed=1)
+    grid = SpatialGrid(segment_bounds(segments))
+    areas = [
+        parse_box("-0.125,51.50,-0.12,51.505"),
+        parse_polygon("-0.11,51.51,-0.105,51.515,-0.115,51.515"),
+    ]
+    expected = np.flatnonzero(
+        segments_cross_polygon(segments, areas[0])
+        | segments_cross_polygon(segments, areas[1])
+    )
+    assert len(expected) > 0
+    assert edges_in_areas(grid, segments, areas).tolist() == expected.tolist()
+
+
+def test_parse_errors():
+    """Boxes need 4 values and polygons at least 3 corners."""
+    with pytest.raises(ValueError):
+        parse_box("-0.12,51.50,-0.11")
+    with pytest.raises(ValueError):
+        parse_polygon("-0.12,51.50,-0.11,51.51")
+
+
+def test_parse_linestring():
+    """Edge geometries in well-known text, and text that is not a line."""
+    line = parse_linestring("LINESTRING (-0.12 51.5, -0.115 51.52, -0.11 51.5)")
+    assert line.tolist() == [[-0.12, 51.5], [-0.115, 51.52], [-0.11, 51.5]]
+    assert parse_linestring("") is None
+    assert parse_linestring("POINT (-0.12 51.5)") is None
+    assert parse_linestring("LINESTRING (-0.12 51.5)") is None
+    assert parse_linestring("LINESTRING (-0.12 51.5, -0.11)") is None
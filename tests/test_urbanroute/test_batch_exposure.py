@@ -0,0 +1,135 @@
+"""Tests for routing many trips in chunks with the batch exposure entrypoint."""
+
+import os
+import sys
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "entrypoints"))
+import batch_exposure  # pylint: disable=wrong-import-position,import-error
+
+
+class FakeGraph:
+    """A graph of three vertices in a line."""
+
+    float_x = SimpleNamespace(a=np.array([-0.12, -0.11, -0.10]))
+    float_y = SimpleNamespace(a=np.array([51.50, 51.50, 51.51]))
+
+
+def fake_route_trip(_, algorithm, source_coord, target_coord):
+    """Two routes for mospp and one otherwise, of a length of their number of
+    vertices; trips starting south of the equator have no route."""
+    if source_coord[0] < 0:
+        raise Exception("The start is not connected to the target")
+    assert target_coord[0] > 0
+    routes = [np.array([0, 1, 2])]
+    if algorithm == batch_exposure.Algorithm.mospp:
+        routes.append(np.array([0, 2]))
+    return routes, [(float(len(route)), 1.0) for route in routes]
+
+
+def trips(n=5):
+    """Trips across central London, the last of which starts south of the equator."""
+    return pd.DataFrame(
+        {
+            "source_lat": [51.5] * (n - 1) + [-1.0],
+            "source_long": [-0.12] * n,
+            "target_lat": [51.51] * n,
+            "target_long": [-0.10] * n,
+        }
+    )
+
+
+@pytest.fixture(name="fake_graph")
+def fixture_fake_graph(monkeypatch):
+    """Route every trip on the fake graph, in this process or forked workers."""
+    monkeypatch.setattr(batch_exposure, "route_trip", fake_route_trip)
+    monkeypatch.setattr(batch_exposure, "GRAPH", FakeGraph())
+    monkeypatch.setattr(
+        batch_exposure, "RoutingGraph", SimpleNamespace(load=lambda path: FakeGraph())
+    )
+
+
+def test_read_trips(tmp_path):
+    """Trips are numbered unless they have a trip_id, from csv or parquet."""
+    df = trips()
+    df.to_csv(tmp_path / "trips.csv", index=False)
+    read = batch_exposure.read_trips(str(tmp_path / "trips.csv"))
+    assert read.columns.tolist() == ["trip_id"] + batch_exposure.TRIP_COLUMNS
+    assert read["trip_id"].tolist() == [0, 1, 2, 3, 4]
+
+    df["trip_id"] = ["a", "b", "c", "d", "e"]
+    df["mode"] = "walk"
+    df.to_parquet(tmp_path / "trips.parquet", index=False)
+    read = batch_exposure.read_trips(str(tmp_path / "trips.parquet"))
+    assert read["trip_id"].tolist() == ["a", "b", "c", "d", "e"]
+    assert "mode" not in read.columns
+
+    df.drop(columns=["target_lat"]).to_csv(tmp_path / "missing.csv", index=False)
+    with pytest.raises(ValueError, match="target_lat"):
+        batch_exposure.read_trips(str(tmp_path / "missing.csv"))
+
+
+@pytest.mark.usefixtures("fake_graph")
+def test_process_chunk(tmp_path):
+    """A row per route of every trip, and a row with the error of a failed trip."""
+    task = (
+        3,
+        trips().assign(trip_id=range(5)),
+        batch_exposure.Algorithm.mospp,
+        True,
+        str(tmp_path),
+    )
+    assert batch_exposure.process_chunk(task) == (3, 5)
+    assert os.listdir(tmp_path) == ["part-000003.parquet"]
+    results = pd.read_parquet(tmp_path / "part-000003.parquet")
+    assert results.columns.tolist() == [
+        "trip_id",
+        "route",
+        "length",
+        "exposure",
+        "geometry",
+        "error",
+    ]
+    assert results["trip_id"].tolist() == [0, 0, 1, 1, 2, 2, 3, 3, 4]
+    assert results["route"].tolist() == [0, 1] * 4 + [0]
+    assert results["length"].tolist()[:2] == [3.0, 2.0]
+    assert results["error"].isna().tolist() == [True] * 8 + [False]
+    assert results["geometry"][0] != results["geometry"][1]
+
+
+@pytest.mark.usefixtures("fake_graph")
+def test_resume(tmp_path):
+    """Chunks already written are skipped, and a job with other settings is
+    refused rather than resumed."""
+    trips().to_csv(tmp_path / "trips.csv", index=False)
+    output = tmp_path / "results"
+
+    def run(**kwargs):
+        options = dict(chunk_size=2, processes=1)
+        options.update(kwargs)
+        batch_exposure.main(str(tmp_path / "trips.csv"), str(output), **options)
+
+    run()
+    parts = ["part-00000{}.parquet".format(i) for i in range(3)]
+    assert sorted(os.listdir(output)) == ["metadata.json"] + parts
+    written = os.stat(output / parts[0]).st_mtime_ns
+    os.remove(output / parts[1])
+    run()
+    assert sorted(os.listdir(output)) == ["metadata.json"] + parts
+    assert os.stat(output / parts[0]).st_mtime_ns == written
+    results = pd.concat(pd.read_parquet(output / part) for part in parts)
+    assert results["trip_id"].tolist() == [0, 1, 2, 3, 4]
+
+    with pytest.raises(ValueError, match="chunk_size"):
+        run(chunk_size=3)
+    with pytest.raises(ValueError, match="algorithm"):
+        run(algorithm=batch_exposure.Algorithm.route)
+    trips(6).to_csv(tmp_path / "trips.csv", index=False)
+    with pytest.raises(ValueError, match="chunks, trips"):
+        run()
+    os.remove(output / "metadata.json")
+    with pytest.raises(ValueError, match="metadata.json"):
+        run()
@@ -0,0 +1,113 @@
+"""Tests for building graphs tile by tile."""
+
+import geopandas as gpd
+import networkx as nx
+import pytest
+from shapely.geometry import LineString, Polygon
+from urbanroute.build import assign_tiles, cost_tiles, tile_bounds, to_graph_tool
+from urbanroute.geospatial import parse_linestring, update_cost
+
+
+def grid_graph():
+    """A 4x4 grid of streets 0.01 degrees apart, in both directions."""
+    G = nx.MultiDiGraph(crs="epsg:4326")
+    for i in range(4):
+        for j in range(4):
+            G.add_node(i * 4 + j, x=i * 0.01, y=j * 0.01)
+    for i in range(4):
+        for j in range(4):
+            for di, dj in [(1, 0), (0, 1)]:
+                if i + di < 4 and j + dj < 4:
+                    u, v = i * 4 + j, (i + di) * 4 + j + dj
+                    G.add_edge(u, v, length=1000.0)
+                    G.add_edge(v, u, length=1000.0)
+    return G
+
+
+def curved_grid_graph():
+    """The grid with a street bending far east of its nodes, to beyond the grid."""
+    G = grid_graph()
+    G.add_edge(
+        0, 1, length=1000.0, geometry=LineString([(0, 0), (0.05, 0.005), (0, 0.01)])
+    )
+    return G
+
+
+def pollution():
+    """Two cells of pollution covering the west and east of the grid, and a third
+    east of the grid."""
+    return gpd.GeoDataFrame(
+        {"NO2_mean": [10.0, 20.0, 50.0]},
+        geometry=[
+            Polygon([(-0.01, -0.01), (0.015, -0.01), (0.015, 0.04), (-0.01, 0.04)]),
+            Polygon([(0.015, -0.01), (0.04, -0.01), (0.04, 0.04), (0.015, 0.04)]),
+            Polygon([(0.04, -0.01), (0.06, -0.01), (0.06, 0.04), (0.04, 0.04)]),
+        ],
+        crs="EPSG:4326",
+    )
+
+
+def test_every_edge_in_one_tile():
+    """Tiles partition the edges of the graph."""
+    G = grid_graph()
+    tiles = assign_tiles(G, 0.015)
+    assert len(tiles) > 1
+    edges = [edge for tile in tiles.values() for edge in tile]
+    assert sorted(edges) == sorted(G.edges(keys=True))
+
+
+def test_tiled_cost_matches_whole_graph():
+    """Costing tile by tile gives the same costs as costing the whole graph."""
+    whole = update_cost(
+        grid_graph(), pollution(), cost_attr="NO2_mean", weight_attr="length"
+    )
+    tiled = cost_tiles(
+        grid_graph(),
+        pollution(),
+        tile_size=0.015,
+        cost_attr="NO2_mean",
+        weight_attr="length",
+        processes=2,
+    )
+    for u, v, k, data in whole.edges(keys=True, data=True):
+        assert tiled[u][v][k]["NO2_mean"] == pytest.approx(data["NO2_mean"])
+        assert tiled[u][v][k]["gamma"] == pytest.approx(data["gamma"])
+
+
+def test_tile_bounds_follow_curved_edges():
+    """The bounds of a tile include the geometry of its curved edges."""
+    west, south, east, north = tile_bounds(curved_grid_graph(), margin=0.0)
+    assert (west, south, east, north) == pytest.approx((0.0, 0.0, 0.05, 0.03))
+
+
+def test_tiled_cost_of_curved_edges():
+    """A curved edge is costed from every cell it crosses, even those beyond the
+    extent of the nodes of its tile."""
+    whole = update_cost(
+        curved_grid_graph(), pollution(), cost_attr="NO2_mean", weight_attr="length"
+    )
+    tiled = cost_tiles(
+        curved_grid_graph(),
+        pollution(),
+        tile_size=0.015,
+        cost_attr="NO2_mean",
+        weight_attr="length",
+        processes=2,
+    )
+    key = max(whole[0][1])
+    assert whole[0][1][key]["gamma"] == pytest.approx(80.0 / 3)
+    for u, v, k, data in whole.edges(keys=True, data=True):
+        assert tiled[u][v][k]["NO2_mean"] == pytest.approx(data["NO2_mean"])
+        assert tiled[u][v][k]["gamma"] == pytest.approx(data["gamma"])
+
+
+def test_to_graph_tool_keeps_geometry():
+    """The geometry of curved edges is kept as well-known text, empty for others."""
+    G = curved_grid_graph()
+    gt_graph = to_graph_tool(G)
+    geometry = gt_graph.edge_properties["geometry"]
+    lines = [geometry[e] for e in gt_graph.edges()]
+    assert len(lines) == G.number_of_edges()
+    assert sum(line != "" for line in lines) == 1
+    (curved,) = [line for line in lines if line]
+    assert parse_linestring(curved).tolist() == [[0, 0], [0.05, 0.005], [0, 0.01]]
@@ -0,0 +1,71 @@
+"""Tests for the on-disk cache of hex grid results."""
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import Polygon
+from urbanroute.queries import HexGridCache
+
+
+def hexgrid(value):
+    """Two square cells of fixture results."""
+    return gpd.GeoDataFrame(
+        {"point_id": ["a", "b"], "NO2_mean": [value, value + 1.0]},
+        geometry=[
+            Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+            Polygon([(1, 0), (2, 0), (2, 1), (1, 1)]),
+        ],
+        crs="EPSG:4326",
+    )
+
+
+class FixtureQuery:
+    """Stands in for the database, counting the queries made."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def query_gdf(self, instance_id, data_id=None, start_time=None, upto_time=None):
+        """Results whose values depend on the number of queries made."""
+        self.calls += 1
+        return hexgrid(float(self.calls))
+
+
+def test_read_through(tmp_path):
+    """Results are queried once and then read from disk, unless refreshed."""
+    query = FixtureQuery()
+    cache = HexGridCache(str(tmp_path), query)
+    first = cache.query_results("instance", start_time="2020-01-24T09:00:00")
+    second = cache.query_results("instance", start_time="2020-01-24T09:00:00")
+    assert query.calls == 1
+    assert list(second["NO2_mean"]) == list(first["NO2_mean"])
+    assert second.geometry.equals(first.geometry)
+    cache.query_results("instance", start_time="2020-01-24T10:00:00")
+    assert query.calls == 2
+    refreshed = cache.query_results(
+        "instance", start_time="2020-01-24T09:00:00", force_refresh=True
+    )
+    assert query.calls == 3
+    assert list(refreshed["NO2_mean"]) == [3.0, 4.0]
+
+
+def test_offline(tmp_path):
+    """Fixture data stored in the cache is read without a database."""
+    cache = HexGridCache(str(tmp_path))
+    cache.store(hexgrid(1.0), "instance", data_id="data")
+    assert list(cache.query_results("instance", data_id="data")["NO2_mean"]) == [
+        1.0,
+        2.0,
+    ]
+    with pytest.raises(KeyError):
+        cache.query_results("other")
+
+
+def test_eviction(tmp_path):
+    """The least recently used results are removed when over the size limit."""
+    cache = HexGridCache(str(tmp_path))
+    first = cache.store(hexgrid(1.0), "first")
+    cache.max_bytes = cache.nbytes() + 1
+    second = cache.store(hexgrid(2.0), "second")
+    assert cache.nbytes() <= cache.max_bytes
+    assert not (tmp_path / first).exists()
+    assert (tmp_path / second).exists()
@@ -0,0 +1,34 @@
+"""Tests for matching coordinates to the closest vertex."""
+
+from collections import namedtuple
+import numpy as np
+from urbanroute.geospatial import SpatialGrid, coord_match
+
+Position = namedtuple("Position", ["a"])
+
+
+def random_vertices(n=500, seed=2):
+    """Longitude, latitude of vertices scattered over central London."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform([-0.14, 51.49], [-0.10, 51.52], (n, 2))
+
+
+def test_coord_match_closest():
+    """The closest vertex is found, however far it is from the coordinate."""
+    vertices = np.array([[-0.12, 51.50], [-0.1201, 51.5001], [-0.10, 51.52]])
+    pos = [Position(vertex) for vertex in vertices]
+    assert coord_match(vertices, (51.50011, -0.12011), pos) == 1
+    assert coord_match(vertices, (51.4999, -0.1199), pos) == 0
+    # far outside the first box around the coordinate
+    assert coord_match(vertices, (51.6, -0.05), pos) == 2
+
+
+def test_coord_match_with_grid():
+    """Matching with a grid of the vertices finds the same vertex as a full scan."""
+    vertices = random_vertices()
+    pos = [Position(vertex) for vertex in vertices]
+    grid = SpatialGrid(np.hstack([vertices, vertices]))
+    for coord in [(51.505, -0.12), (51.49, -0.14), (51.53, -0.09)]:
+        assert coord_match(vertices, coord, pos, grid=grid) == coord_match(
+            vertices, coord, pos
+        )
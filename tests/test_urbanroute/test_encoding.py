@@ -0,0 +1,47 @@
+"""Tests for the compact encodings of routes."""
+
+import numpy as np
+import pytest
+from urbanroute.serving.encoding import (
+    Encoding,
+    common_prefix,
+    decode_polyline,
+    encode_polyline,
+    encode_routes,
+)
+
+
+def test_polyline():
+    """The example of the encoded polyline algorithm format and its inverse."""
+    lat = np.array([38.5, 40.7, 43.252])
+    lon = np.array([-120.2, -120.95, -126.453])
+    polyline = encode_polyline(lat, lon)
+    assert polyline == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert decode_polyline(polyline) == pytest.approx(np.column_stack([lat, lon]))
+    assert encode_polyline(np.array([]), np.array([])) == ""
+
+
+def test_shared_prefixes():
+    """Routes reference the earlier route they share the most vertices with."""
+    lon = np.linspace(-0.13, -0.12, 6)
+    lat = np.linspace(51.50, 51.51, 6)
+    routes = [np.array([0, 1, 2, 3]), np.array([0, 1, 2, 4]), np.array([0, 5])]
+    assert common_prefix(routes[0], routes[1]) == 3
+    encoded = encode_routes(
+        routes, lon, lat, [3.0, 4.0, 5.0], [30.0, 20.0, 10.0], Encoding.array, True
+    )
+    assert encoded["encoding"] == "array"
+    first, second, third = encoded["routes"]
+    assert (first["length"], first["exposure"]) == (3.0, 30.0)
+    assert "prefix" not in first
+    assert second["prefix"] == [0, 3]
+    assert second["coordinates"] == pytest.approx([lon[4], lat[4]])
+    assert "prefix" not in third
+    assert third["coordinates"] == pytest.approx([lon[0], lat[0], lon[5], lat[5]])
+
+    encoded = encode_routes(
+        routes, lon, lat, [3.0, 4.0, 5.0], [30.0, 20.0, 10.0], Encoding.polyline
+    )
+    assert decode_polyline(encoded["routes"][1]["polyline"]) == pytest.approx(
+        np.column_stack([lat[routes[1]], lon[routes[1]]]), abs=1e-5
+    )
@@ -0,0 +1,43 @@
+"""The serving path must not import the build-time GIS and database stack."""
+
+import subprocess
+import sys
+
+BUILD_MODULES = [
+    "cleanair",
+    "geopandas",
+    "graph_tool.draw",
+    "matplotlib",
+    "networkx",
+    "osmnx",
+    "sqlalchemy",
+]
+
+
+def test_serving_imports_are_slim():
+    """Importing the serving modules leaves every build-time module unloaded."""
+    code = (
+        "import sys, routex, urbanroute.serving, urbanroute.tiles, urbanroute.queries;"
+        "print(' '.join(m for m in {} if m in sys.modules))".format(BUILD_MODULES)
+    )
+    loaded = subprocess.run(
+        [sys.executable, "-c", code], check=True, stdout=subprocess.PIPE
+    ).stdout.decode()
+    assert loaded.split() == []
+
+
+def test_startup_profile():
+    """The startup profile records imports and initialisation stages."""
+    from urbanroute.profiling import StartupProfile
+
+    profile = StartupProfile()
+    profile.install()
+    try:
+        with profile.stage("setup"):
+            import colorsys  # pylint: disable=unused-import,import-outside-toplevel
+    finally:
+        profile.uninstall()
+    names = [timing[0] for timing in profile.timings]
+    assert "setup" in names
+    assert "colorsys" in names
+    assert "setup" in profile.report()
@@ -0,0 +1,81 @@
+"""Tests for the multi-region graph registry."""
+
+import threading
+from collections import namedtuple
+import pytest
+from urbanroute.serving import GraphRegistry, Region, RegionNotFound
+
+FakeGraph = namedtuple("FakeGraph", ["path", "nbytes"])
+
+REGIONS = [
+    Region("london", "london.gt", (-0.5, 51.3, 0.3, 51.7)),
+    Region("westminster", "westminster.gt", (-0.2, 51.48, -0.1, 51.53)),
+    Region("manchester", "manchester.gt", (-2.3, 53.4, -2.1, 53.5)),
+]
+
+
+def registry(memory_budget=None):
+    """A registry whose graphs cost 100 bytes each and record their loads."""
+    loads = []
+
+    def loader(path):
+        loads.append(path)
+        return FakeGraph(path, 100)
+
+    return GraphRegistry(REGIONS, memory_budget=memory_budget, loader=loader), loads
+
+
+def test_smallest_region_chosen():
+    """The smallest region containing every coordinate serves the request."""
+    reg, _ = registry()
+    assert reg.region_for((51.51, -0.12), (51.50, -0.15)).name == "westminster"
+    assert reg.region_for((51.51, -0.12), (51.40, 0.1)).name == "london"
+    assert reg.region_for((53.48, -2.24)).name == "manchester"
+    with pytest.raises(RegionNotFound):
+        reg.region_for((51.51, -0.12), (53.48, -2.24))
+
+
+def test_lazy_loading():
+    """Graphs are loaded on first use only."""
+    reg, loads = registry()
+    assert loads == []
+    assert reg.get((51.51, -0.12)).path == "westminster.gt"
+    reg.get((51.52, -0.13))
+    assert loads == ["westminster.gt"]
+
+
+def test_lru_eviction():
+    """The least recently used graph is evicted when over the memory budget."""
+    reg, loads = registry(memory_budget=200)
+    reg["london"]
+    reg["westminster"]
+    reg["london"]
+    reg["manchester"]
+    assert reg.resident == ["london", "manchester"]
+    assert reg.memory_usage() == 200
+    reg["westminster"]
+    assert loads == ["london.gt", "westminster.gt", "manchester.gt", "westminster.gt"]
+
+
+def test_loading_does_not_block_other_regions():
+    """Graphs in memory are served while the graph of another region loads."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def loader(path):
+        if path == "london.gt":
+            started.set()
+            release.wait(5)
+        return FakeGraph(path, 100)
+
+    reg = GraphRegistry(REGIONS, loader=loader)
+    reg["westminster"]
+    thread = threading.Thread(target=lambda: reg["london"])
+    thread.start()
+    assert started.wait(5)
+    # london is still loading
+    assert reg["westminster"].path == "westminster.gt"
+    assert reg.resident == ["westminster"]
+    release.set()
+    thread.join(5)
+    assert reg.resident == ["westminster", "london"]
@@ -0,0 +1,70 @@
+"""Tests for pruning and routing on the graph of one region."""
+
+import numpy as np
+import pytest
+from routex import astar
+from urbanroute.geospatial import ellipse_bounding_box
+from urbanroute.geospatial.avoid_areas import box_polygon
+from urbanroute.serving import RoutingGraph, distance_heuristic
+
+SOURCE = 253
+TARGET = 3043
+
+
+@pytest.fixture(name="graph", scope="module")
+def fixture_graph():
+    """The graph around Trafalgar Square."""
+    return RoutingGraph.load("./tests/test_graphs/Trafalgar.gt")
+
+
+def full_scan(graph, source, target):
+    """The vertex filter of a query found by looking at every vertex."""
+    box = ellipse_bounding_box(graph.pos[source], graph.pos[target])
+    lower_left = np.array([box[3], box[1]])
+    upper_right = np.array([box[2], box[0]])
+    inside = np.logical_and(
+        np.all(
+            np.logical_and(lower_left <= graph.vertices, graph.vertices <= upper_right),
+            axis=1,
+        ),
+        graph.del_list.a,
+    )
+    inside[[source, target]] = True
+    return inside
+
+
+def test_prune_matches_full_scan(graph):
+    """The vertices kept through the grid are those kept by a full scan, and the
+    vertices of the previous query are cleared."""
+    for source, target in [(SOURCE, TARGET), (TARGET, 10), (SOURCE, TARGET)]:
+        graph.prune(source, target)
+        assert np.array_equal(
+            graph.inside.a.astype(bool), full_scan(graph, source, target)
+        )
+        assert np.array_equal(graph.snapshot().get_vertices(), graph.G.get_vertices())
+
+
+def test_route_on_pruned_graph(graph):
+    """A route is found between the source and target, with a positive length and
+    exposure, and it goes around an area to avoid on its way."""
+    graph.prune(SOURCE, TARGET)
+    route = astar(
+        graph.G, SOURCE, TARGET, graph.float_length, distance_heuristic, graph.pos
+    )[::-1]
+    route = np.array([int(v) for v in route])
+    assert route[0] == SOURCE and route[-1] == TARGET
+    length, exposure = graph.totals(route)
+    assert length > 0 and exposure > 0
+
+    # avoid a small area around a vertex in the middle of the route
+    x, y = graph.vertices[route[len(route) // 2]]
+    area = box_polygon(x - 1e-5, y - 1e-5, x + 1e-5, y + 1e-5)
+    avoided = graph.avoid([area])
+    assert len(avoided) > 0
+    graph.prune(SOURCE, TARGET, [area])
+    assert not graph.kept.a[avoided].any()
+    detour = astar(
+        graph.G, SOURCE, TARGET, graph.float_length, distance_heuristic, graph.pos
+    )[::-1]
+    assert route[len(route) // 2] not in [int(v) for v in detour]
+    assert graph.totals(np.array([int(v) for v in detour]))[0] >= length
@@ -0,0 +1,28 @@
+"""Tests for the tile pyramid coordinates."""
+
+import pytest
+from urbanroute.tiles import mercator_bounds, tile_bounds, tiles_for_bounds
+
+
+def test_world_tile():
+    """The single tile at zoom 0 covers the whole web mercator world."""
+    west, south, east, north = tile_bounds(0, 0, 0)
+    assert (west, east) == (-180, 180)
+    assert north == pytest.approx(85.0511, abs=1e-4)
+    assert south == pytest.approx(-85.0511, abs=1e-4)
+    assert mercator_bounds(1, 1, 1) == pytest.approx(
+        (0, -20037508.342789244, 20037508.342789244, 0)
+    )
+
+
+def test_tiles_cover_bounds():
+    """Every tile returned overlaps the bounding box and the box is fully covered."""
+    bounds = (-0.15, 51.50, -0.10, 51.52)
+    tiles = list(tiles_for_bounds(bounds, 14))
+    assert len(tiles) == 6
+    west = min(tile_bounds(14, x, y)[0] for x, y in tiles)
+    south = min(tile_bounds(14, x, y)[1] for x, y in tiles)
+    east = max(tile_bounds(14, x, y)[2] for x, y in tiles)
+    north = max(tile_bounds(14, x, y)[3] for x, y in tiles)
+    assert west <= bounds[0] and south <= bounds[1]
+    assert east >= bounds[2] and north >= bounds[3]
@@ -14,13 +14,19 @@ setuptools.setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    install_requires=[
-        "cleanair==0.0.1",
-        "geopandas==0.7.0",
-        "networkx==2.4",
-        "osmnx==0.14.1",
-        "sqlalchemy==1.3.11",
-        "fastapi==0.58.1",
-    ],
-    python_requires=">=3.6",
+    # the serving path only needs these, graph-tool is installed with conda
+    install_requires=["fastapi==0.58.1", "haversine==2.2.0", "numpy"],
+    # building graphs and tiles from the database and OpenStreetMap
+    extras_require={
+        "build": [
+            "cleanair==0.0.1",
+            "geopandas==0.7.0",
+            "matplotlib",
+            "networkx==2.4",
+            "osmnx==0.14.1",
+            "pyarrow",
+            "sqlalchemy==1.3.11",
+        ],
+    },
+    python_requires=">=3.7",
 )
@@ -0,0 +1,4 @@
+"""Build costed graphs of large areas from local OpenStreetMap extracts."""
+
+from .convert import to_graph_tool
+from .tiled import assign_tiles, build_graph, cost_tiles, tile_bounds
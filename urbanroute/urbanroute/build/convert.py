@@ -0,0 +1,70 @@
+"""Convert osmnx graphs to graph-tool graphs without a GraphML round trip."""
+
+import logging
+from typing import List, Optional
+import networkx as nx
+import numpy as np
+from graph_tool import Graph
+
+
+def to_graph_tool(
+    G: nx.MultiDiGraph,
+    vertex_attrs: Optional[List[str]] = None,
+    edge_attrs: Optional[List[str]] = None,
+) -> Graph:
+    """Copy the structure and numeric attributes of a graph into graph-tool.
+
+    Args:
+        G: Input graph, e.g. from osmnx.
+
+    Other Args:
+        vertex_attrs: Vertex attributes copied as doubles.
+        edge_attrs: Edge attributes copied as doubles. Missing values are set to 0.
+
+    Returns:
+        Directed graph with an osmid vertex property, the copied attributes and a
+        geometry edge property holding the well-known text of each edge's geometry,
+        empty for edges without one, as the GraphML round trip kept it.
+    """
+    vertex_attrs = ["x", "y"] if vertex_attrs is None else vertex_attrs
+    edge_attrs = ["length"] if edge_attrs is None else edge_attrs
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+
+    gt_graph = Graph(directed=True)
+    gt_graph.add_vertex(len(nodes))
+    osmid = gt_graph.new_vertex_property("int64_t")
+    osmid.a = np.array(nodes, dtype=np.int64)
+    gt_graph.vertex_properties["osmid"] = osmid
+    for attr in vertex_attrs:
+        prop = gt_graph.new_vertex_property("double")
+        prop.a = np.array([G.nodes[node][attr] for node in nodes], dtype=float)
+        gt_graph.vertex_properties[attr] = prop
+
+    edges = list(G.edges(data=True))
+    gt_graph.add_edge_list(
+        np.array([[index[u], index[v]] for u, v, _ in edges], dtype=np.int64).reshape(
+            -1, 2
+        )
+    )
+    for attr in edge_attrs:
+        values = np.array([data.get(attr, np.nan) for _, _, data in edges], dtype=float)
+        missing = np.isnan(values)
+        if missing.any():
+            logging.warning("%s edges have no %s, setting it to 0", missing.sum(), attr)
+            values[missing] = 0
+        prop = gt_graph.new_edge_property("double")
+        prop.a = values
+        gt_graph.edge_properties[attr] = prop
+
+    # the polylines of curved streets, used to find the edges in areas to avoid
+    wkt = [
+        "" if data.get("geometry") is None else data["geometry"].wkt
+        for _, _, data in edges
+    ]
+    geometry = gt_graph.new_edge_property("string")
+    # edges added from a list are indexed in the order of the list
+    for e in gt_graph.edges():
+        geometry[e] = wkt[gt_graph.edge_index[e]]
+    gt_graph.edge_properties["geometry"] = geometry
+    return gt_graph
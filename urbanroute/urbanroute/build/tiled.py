@@ -0,0 +1,174 @@
+"""Cost the edges of a city-scale graph tile by tile in a process pool."""
+
+import logging
+from multiprocessing import Pool
+from typing import Dict, Optional, Tuple
+import geopandas as gpd
+import networkx as nx
+import numpy as np
+import osmnx as ox
+from ..geospatial.intersection import update_cost
+from .convert import to_graph_tool
+
+Tile = Tuple[int, int]
+# degrees added around the edges of a tile when clipping the dataframe to them
+CLIP_MARGIN = 1e-4
+
+
+def assign_tiles(G: nx.MultiDiGraph, tile_size: float) -> Dict[Tile, list]:
+    """Split the edges of a graph into square tiles.
+
+    Each edge belongs to exactly one tile, the one containing the midpoint of its
+    end nodes, so tiles can be costed independently and stitched back without
+    duplicates.
+
+    Args:
+        G: Input graph with x and y on the nodes.
+        tile_size: Width and height of a tile in degrees.
+
+    Returns:
+        The (u, v, key) of the edges in each (column, row) tile.
+    """
+    edges = list(G.edges(keys=True))
+    u_xy = np.array([(G.nodes[u]["x"], G.nodes[u]["y"]) for u, _, _ in edges])
+    v_xy = np.array([(G.nodes[v]["x"], G.nodes[v]["y"]) for _, v, _ in edges])
+    cells = np.floor((u_xy + v_xy) / 2 / tile_size).astype(int).reshape(-1, 2)
+    tiles = {}
+    for edge, cell in zip(edges, map(tuple, cells)):
+        tiles.setdefault(cell, []).append(edge)
+    return tiles
+
+
+def tile_bounds(
+    G_tile: nx.MultiDiGraph, margin: Optional[float] = CLIP_MARGIN
+) -> Tuple[float, float, float, float]:
+    """West, south, east and north of the edges of a tile.
+
+    Edges with a geometry attribute, e.g. the curved streets of a simplified
+    osmnx graph, may leave the extent of their nodes, so their bounds are
+    included too.
+
+    Args:
+        G_tile: Edges of a tile, with x and y on the nodes.
+        margin: Degrees added on every side.
+
+    Returns:
+        The bounds grown by the margin.
+    """
+    xs = [x for _, x in G_tile.nodes(data="x")]
+    ys = [y for _, y in G_tile.nodes(data="y")]
+    for _, _, geometry in G_tile.edges(data="geometry"):
+        if geometry is not None:
+            west, south, east, north = geometry.bounds
+            xs += [west, east]
+            ys += [south, north]
+    return min(xs) - margin, min(ys) - margin, max(xs) + margin, max(ys) + margin
+
+
+def _cost_tile(task) -> Dict[Tuple, Tuple[float, float]]:
+    """Run update_cost on one tile, returning the new attributes of its edges."""
+    G_tile, gdf_tile, cost_attr, weight_attr = task
+    G_tile = update_cost(G_tile, gdf_tile, cost_attr=cost_attr, weight_attr=weight_attr)
+    return {
+        (u, v, k): (data.get("gamma"), data.get(cost_attr))
+        for u, v, k, data in G_tile.edges(keys=True, data=True)
+    }
+
+
+def cost_tiles(  # pylint: disable=too-many-arguments
+    G: nx.MultiDiGraph,
+    gdf: gpd.GeoDataFrame,
+    tile_size: Optional[float] = 0.02,
+    cost_attr: Optional[str] = "cost",
+    weight_attr: Optional[str] = "weight",
+    processes: Optional[int] = None,
+) -> nx.MultiDiGraph:
+    """Update the cost of edges from a geo dataframe, one tile per task.
+
+    Args:
+        G: Input graph. Must have x and y on the nodes.
+        gdf: Must contain geometry column and value column.
+
+    Other Args:
+        tile_size: Width and height of a tile in degrees.
+        cost_attr: Name of the cost function.
+        weight_attr: Name of the weight function.
+        processes: Number of worker processes, defaults to the number of cpus.
+
+    Returns:
+        Graph with updated cost and gamma attributes.
+    """
+    tiles = assign_tiles(G, tile_size)
+    logging.info("Costing %s edges in %s tiles", G.number_of_edges(), len(tiles))
+
+    def tasks():
+        for edges in tiles.values():
+            G_tile = G.edge_subgraph(edges).copy()
+            # edges leave their tile, so clip to the extent of the tile's edges
+            west, south, east, north = tile_bounds(G_tile)
+            gdf_tile = gdf.cx[west:east, south:north]
+            yield G_tile, gdf_tile, cost_attr, weight_attr
+
+    with Pool(processes) as pool:
+        # tasks are still being copied from G, so only stitch once every tile is done
+        results = list(pool.imap_unordered(_cost_tile, tasks()))
+    # stitch the costs of each tile back into the whole graph
+    for costs in results:
+        for (u, v, k), (gamma, cost) in costs.items():
+            if cost is not None:
+                G[u][v][k]["gamma"] = gamma
+                G[u][v][k][cost_attr] = cost
+    return G
+
+
+def build_graph(  # pylint: disable=too-many-arguments
+    osm_file: str,
+    gdf: gpd.GeoDataFrame,
+    output: str,
+    tile_size: Optional[float] = 0.02,
+    cost_attr: Optional[str] = "NO2_mean",
+    processes: Optional[int] = None,
+) -> None:
+    """Build a graph from an OpenStreetMap extract, cost it and save it in .gt format.
+
+    The extract is read and simplified by osmnx as a whole in this process, as
+    streets are simplified across tile borders, so only the costing is tiled.
+
+    Args:
+        osm_file: OpenStreetMap XML extract of the area.
+        gdf: Air quality results with a geometry column and value column.
+        output: Path of the .gt file written.
+
+    Other Args:
+        tile_size: Width and height of a tile in degrees.
+        cost_attr: Name of the value column in gdf.
+        processes: Number of worker processes, defaults to the number of cpus.
+    """
+    logging.info("Reading %s", osm_file)
+    G = ox.graph_from_xml(osm_file, simplify=True)
+    G = cost_tiles(
+        G,
+        gdf,
+        tile_size=tile_size,
+        cost_attr=cost_attr,
+        weight_attr="length",
+        processes=processes,
+    )
+    gt_graph = to_graph_tool(G, edge_attrs=["length", cost_attr, "gamma"])
+    gt_graph.save(output)
+    logging.info(
+        "Saved %s nodes and %s edges to %s",
+        gt_graph.num_vertices(),
+        gt_graph.num_edges(),
+        output,
+    )
+    # the bounds of the region served from this graph, see graphs/regions.json
+    logging.info(
+        "Bounds of the graph: %s",
+        [
+            min(x for _, x in G.nodes(data="x")),
+            min(y for _, y in G.nodes(data="y")),
+            max(x for _, x in G.nodes(data="x")),
+            max(y for _, y in G.nodes(data="y")),
+        ],
+    )
@@ -1,6 +1,11 @@
 """For geospatial queries and operations on graph."""
 
-from .intersection import update_cost
+from ..lazy import lazy_attributes
 from .ellipses import ellipse_bounding_box
 from .coord_match import coord_match
 from .simplify_graph import remove_leaves, remove_paths
+from .spatial_grid import SpatialGrid
+from .avoid_areas import edges_in_areas, parse_box, parse_linestring, parse_polygon
+
+# build-time functions need osmnx and geopandas, which serving never loads
+__getattr__ = lazy_attributes(__name__, {"update_cost": ".intersection"})
@@ -0,0 +1,130 @@
+"""
+    Areas that routes must avoid, e.g. road closures, and the edges that cross them
+"""
+from typing import List, Optional
+import numpy as np
+
+
+def box_polygon(west: float, south: float, east: float, north: float) -> np.ndarray:
+    """The corners of a bounding box as a polygon of longitude, latitude rows."""
+    return np.array([[west, south], [east, south], [east, north], [west, north]])
+
+
+def parse_box(text: str) -> np.ndarray:
+    """A polygon from a "west,south,east,north" bounding box."""
+    values = [float(value) for value in text.split(",")]
+    if len(values) != 4:
+        raise ValueError("A box to avoid needs west,south,east,north: {}".format(text))
+    return box_polygon(*values)
+
+
+def parse_polygon(text: str) -> np.ndarray:
+    """A polygon from a flat "longitude,latitude,longitude,latitude,..." list."""
+    values = [float(value) for value in text.split(",")]
+    if len(values) % 2 or len(values) < 6:
+        raise ValueError(
+            "A polygon to avoid needs at least 3 longitude,latitude pairs: {}".format(
+                text
+            )
+        )
+    return np.array(values).reshape(-1, 2)
+
+
+def parse_linestring(text: str) -> Optional[np.ndarray]:
+    """
+    The points of a "LINESTRING (x y, x y, ...)" geometry in well-known text, e.g.
+    the geometry of an edge of an osmnx graph.
+    Returns:
+        mx2 matrix of the x, y of each point, or None if the text is not a line
+    """
+    start, end = text.find("("), text.rfind(")")
+    if not text.lstrip().upper().startswith("LINESTRING") or start < 0 or end < start:
+        return None
+    try:
+        points = np.array(
+            [
+                [float(v) for v in point.split()]
+                for point in text[start + 1 : end].split(",")
+            ]
+        )
+    except ValueError:
+        return None
+    if points.ndim != 2 or points.shape[1] != 2 or len(points) < 2:
+        return None
+    return points
+
+
+def points_in_polygon(x: np.ndarray, y: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    Which points are inside a polygon, by counting the polygon sides a ray from
+    each point crosses.
+    Args:
+        x, y: longitude and latitude of every point
+        polygon: mx2 matrix of the longitude, latitude of its corners
+    Returns:
+        true for each point inside the polygon
+    """
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    x, y = x[:, None], y[:, None]
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing = x < x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return np.logical_xor.reduce(straddles & crossing, axis=1)
+
+
+def _orientation(ax, ay, bx, by, cx, cy):
+    """Sign of the turn from a to b to c."""
+    return np.sign((bx - ax) * (cy - ay) - (by - ay) * (cx - ax))
+
+
+def segments_cross_polygon(segments: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    Which straight segments intersect a polygon, either crossing one of its sides
+    or lying inside it. Touching a side counts as crossing it.
+    Args:
+        segments: nx4 matrix of the x, y of the start and x, y of the end of each segment
+        polygon: mx2 matrix of the longitude, latitude of its corners
+    Returns:
+        true for each segment that intersects the polygon
+    """
+    ax, ay, bx, by = (segments[:, i, None] for i in range(4))
+    cx, cy = polygon[:, 0], polygon[:, 1]
+    dx, dy = np.roll(cx, -1), np.roll(cy, -1)
+    # the ends of each segment are on opposite sides of a polygon side and vice versa
+    sides_ab = _orientation(ax, ay, bx, by, cx, cy)
+    sides_ab *= _orientation(ax, ay, bx, by, dx, dy)
+    sides_cd = _orientation(cx, cy, dx, dy, ax, ay)
+    sides_cd *= _orientation(cx, cy, dx, dy, bx, by)
+    crosses = (
+        (sides_ab <= 0)
+        & (sides_cd <= 0)
+        # collinear segments only touch if their bounding boxes overlap
+        & (np.minimum(ax, bx) <= np.maximum(cx, dx))
+        & (np.minimum(cx, dx) <= np.maximum(ax, bx))
+        & (np.minimum(ay, by) <= np.maximum(cy, dy))
+        & (np.minimum(cy, dy) <= np.maximum(ay, by))
+    ).any(axis=1)
+    # a segment that crosses no side is either wholly inside or wholly outside
+    return crosses | points_in_polygon(segments[:, 0], segments[:, 1], polygon)
+
+
+def edges_in_areas(grid, segments: np.ndarray, areas: List[np.ndarray]) -> np.ndarray:
+    """
+    Edges that intersect any of the areas, looking only at the edges in the grid
+    cells that overlap each area.
+    Args:
+        grid: SpatialGrid of the bounding boxes of the edges
+        segments: nx4 matrix of the x, y of the source and x, y of the target of
+            every edge in the grid
+        areas: polygons to avoid as mx2 matrices of longitude, latitude
+    Returns:
+        sorted unique rows of segments that intersect an area
+    """
+    found = [np.empty(0, dtype=np.int64)]
+    for polygon in areas:
+        west, south = polygon.min(axis=0)
+        east, north = polygon.max(axis=0)
+        candidates = grid.query(west, south, east, north)
+        found.append(candidates[segments_cross_polygon(segments[candidates], polygon)])
+    return np.unique(np.concatenate(found))
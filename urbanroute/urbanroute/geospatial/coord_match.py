@@ -3,9 +3,12 @@
 """
 import math
 import numpy as np
+from .spatial_grid import SpatialGrid
 
 
-def coord_match(vertices, target_coord: np.array, pos, minimum=0.0009):
+def coord_match(
+    vertices, target_coord: np.array, pos, minimum=0.0009, grid: SpatialGrid = None
+):
     """
     Given a coordinate, find the closest vertex in the graph quickly
     Args:
@@ -15,19 +18,24 @@ def coord_match(vertices, target_coord: np.array, pos, minimum=0.0009):
         pos: the definition of distance in our graph; typically x is long and y is lat
         minimum: the inital bounding box around the coord; the closest match is expected
                  to be within this distance of the coordinate
+        grid: optional SpatialGrid of the vertices, so only the vertices near the
+              coordinate are looked at
     Returns:
         closest vertex, target
     """
     # find all points within a box around the coordinate
     lower_left = np.array([target_coord[1] - minimum, target_coord[0] - minimum])
     upper_right = np.array([target_coord[1] + minimum, target_coord[0] + minimum])
-    indices = np.all(
-        np.logical_and(lower_left <= vertices, vertices <= upper_right), axis=1
-    )
-    inside_box = np.where(indices == 1)
+    if grid is None:
+        indices = np.all(
+            np.logical_and(lower_left <= vertices, vertices <= upper_right), axis=1
+        )
+        inside_box = np.where(indices == 1)[0]
+    else:
+        inside_box = grid.query(*lower_left, *upper_right)
     target = None
     # use euclidean distance to pick the closest point within the box
-    for v in inside_box[0]:
+    for v in inside_box:
         if (
             math.sqrt(
                 np.sum(
@@ -43,5 +51,5 @@ def coord_match(vertices, target_coord: np.array, pos, minimum=0.0009):
             )
             target = v
     if target is None:
-        return coord_match(vertices, target_coord, pos, minimum * 2)
+        return coord_match(vertices, target_coord, pos, minimum * 2, grid)
     return target
@@ -1,6 +1,6 @@
 """Functions that add vertices to the boolean filter to be ignored by graph algorithms"""
 from haversine import haversine
-from graph_tool.all import Graph
+from graph_tool import Graph
 
 
 def remove_leaves(G: Graph, del_list):
@@ -12,7 +12,8 @@ def remove_leaves(G: Graph, del_list):
 
 
 def remove_paths(G, del_list, pos, length, pollution):
-    """remove vertices with in-degree 1 and out-degree 1"""
+    """remove vertices with in-degree 1 and out-degree 1, returning each new edge
+    with the two edges it bridges"""
     new_edges = []
     for v in G.vertices():
         del_list[v] = True
@@ -56,12 +57,15 @@ def remove_paths(G, del_list, pos, length, pollution):
 
             if cut and (not into is None) and (not outof is None):
                 e = (into.source(), outof.target(), new_edge_length, new_edge_pollution)
-                new_edges.append(e)
+                new_edges.append((e, into, outof))
                 # remove vertex
                 del_list[v] = False
 
     # create a new edge bridging the removed vertex
-    for e in new_edges:
+    bridges = []
+    for e, into, outof in new_edges:
         new = G.add_edge(e[0], e[1])
         length[new] = e[2]
         pollution[new] = e[3]
+        bridges.append((new, into, outof))
+    return bridges
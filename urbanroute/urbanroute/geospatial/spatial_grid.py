@@ -0,0 +1,81 @@
+"""
+    A uniform grid of cells to find the items near an area without scanning every item
+"""
+import numpy as np
+
+
+class SpatialGrid:
+    """Index of items, e.g. edges or vertices, by the grid cells their bounding boxes overlap.
+
+    The items of each cell are stored contiguously, cell after cell, so the items of
+    a query are gathered from one slice per row of cells it overlaps.
+    """
+
+    def __init__(self, bounds: np.ndarray, cell_size: float = 0.002):
+        """
+        Args:
+            bounds: nx4 matrix of the west, south, east, north of each item.
+                Points have the same west and east, and the same south and north.
+            cell_size: width and height of a cell in degrees.
+        """
+        bounds = np.asarray(bounds, dtype=float).reshape(-1, 4)
+        self.cell_size = cell_size
+        self.origin = bounds[:, :2].min(axis=0) if len(bounds) else np.zeros(2)
+        top = bounds[:, 2:].max(axis=0) if len(bounds) else np.zeros(2)
+        self.columns, self.rows = (
+            np.floor((top - self.origin) / cell_size).astype(np.int64) + 1
+        )
+        first = self._cells(bounds[:, :2])
+        last = self._cells(bounds[:, 2:])
+        # each item is listed in every cell from its first to its last
+        widths = last[:, 0] - first[:, 0] + 1
+        counts = widths * (last[:, 1] - first[:, 1] + 1)
+        items = np.repeat(np.arange(len(bounds)), counts)
+        firsts = np.cumsum(counts) - counts
+        offsets = np.arange(counts.sum()) - np.repeat(firsts, counts)
+        widths = np.repeat(widths, counts)
+        columns = np.repeat(first[:, 0], counts) + offsets % widths
+        rows = np.repeat(first[:, 1], counts) + offsets // widths
+        cells = rows * self.columns + columns
+        order = np.argsort(cells, kind="stable")
+        self.items = items[order]
+        # the items of cell i are items[starts[i]:starts[i + 1]]
+        self.starts = np.searchsorted(
+            cells[order], np.arange(self.columns * self.rows + 1)
+        )
+
+    def _cells(self, points: np.ndarray) -> np.ndarray:
+        """Column and row of the cell containing each point, clipped to the grid."""
+        cells = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+        return np.clip(cells, 0, [self.columns - 1, self.rows - 1])
+
+    def query(self, west: float, south: float, east: float, north: float) -> np.ndarray:
+        """
+        Items in the cells that overlap a bounding box.
+        These include every item whose bounding box overlaps it, and items nearby
+        that share a cell with it, so exact tests are left to the caller.
+        Args:
+            west, south, east, north: the bounding box
+        Returns:
+            sorted unique indices of the items
+        """
+        if (
+            east < self.origin[0]
+            or north < self.origin[1]
+            or west > self.origin[0] + self.columns * self.cell_size
+            or south > self.origin[1] + self.rows * self.cell_size
+        ):
+            return np.empty(0, dtype=np.int64)
+        (first_column, first_row), (last_column, last_row) = self._cells(
+            np.array([[west, south], [east, north]])
+        )
+        slices = [
+            self.items[
+                self.starts[row * self.columns + first_column] : self.starts[
+                    row * self.columns + last_column + 1
+                ]
+            ]
+            for row in range(first_row, last_row + 1)
+        ]
+        # items spanning several cells are listed more than once
+        return np.unique(np.concatenate(slices))
@@ -0,0 +1,23 @@
+"""Import heavy modules on first use rather than when a package is imported."""
+
+from importlib import import_module
+from typing import Any, Callable, Dict
+
+
+def lazy_attributes(package: str, attributes: Dict[str, str]) -> Callable[[str], Any]:
+    """Create a module level __getattr__ (PEP 562) for a package.
+
+    Args:
+        package: Name of the package, i.e. __name__ of its __init__.
+        attributes: Map from attribute name to the relative module it is defined in.
+
+    Returns:
+        Function that imports the module defining an attribute when it is first accessed.
+    """
+
+    def __getattr__(name: str) -> Any:
+        if name not in attributes:
+            raise AttributeError("module {} has no attribute {}".format(package, name))
+        return getattr(import_module(attributes[name], package), name)
+
+    return __getattr__
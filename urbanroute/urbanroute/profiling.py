@@ -0,0 +1,132 @@
+"""Measure how long a process spends importing modules and initialising."""
+
+import importlib.abc
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# set to a non-empty value to profile the startup of the api
+PROFILE_ENV = "URBANROUTE_PROFILE_STARTUP"
+
+
+class _TimingLoader(importlib.abc.Loader):
+    """Wrap a loader to time the execution of the modules it loads."""
+
+    def __init__(self, loader, profile: "StartupProfile"):
+        self.loader = loader
+        self.profile = profile
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self.profile.stage(module.__name__, kind="import"):
+            self.loader.exec_module(module)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """Find modules with the remaining finders and time their loading."""
+
+    def __init__(self, profile: "StartupProfile"):
+        self.profile = profile
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimingLoader(spec.loader, self.profile)
+            return spec
+        return None
+
+
+class StartupProfile:
+    """Record the time taken by every module import and initialisation stage.
+
+    Stages may nest, e.g. an import inside another import. The self time of a
+    stage excludes the time spent in the stages nested inside it.
+    """
+
+    def __init__(self):
+        # name, kind, cumulative seconds, self seconds
+        self.timings: List[Tuple[str, str, float, float]] = []
+        self._children: List[float] = []
+        self._finder: Optional[_TimingFinder] = None
+        self.start = time.perf_counter()
+
+    @classmethod
+    def from_env(cls) -> Optional["StartupProfile"]:
+        """Start profiling imports if the profiling environment variable is set."""
+        if not os.environ.get(PROFILE_ENV):
+            return None
+        profile = cls()
+        profile.install()
+        return profile
+
+    def install(self) -> None:
+        """Time every module imported from now on."""
+        if self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self) -> None:
+        """Stop timing imports."""
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    @contextmanager
+    def stage(self, name: str, kind: Optional[str] = "init") -> Iterator[None]:
+        """Time a block of code, e.g. loading a graph."""
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            self.timings.append((name, kind, elapsed, elapsed - children))
+
+    def totals(self) -> Dict[str, float]:
+        """Total self time of each kind of stage and the wall time since creation."""
+        totals = {"wall": time.perf_counter() - self.start}
+        for _, kind, _, self_time in self.timings:
+            totals[kind] = totals.get(kind, 0.0) + self_time
+        return totals
+
+    def report(self, top: Optional[int] = 25) -> str:
+        """A table of the slowest stages by self time."""
+        lines = [
+            "{:>10} {:>10}  {:<6} {}".format("self ms", "total ms", "kind", "name")
+        ]
+        for name, kind, elapsed, self_time in sorted(
+            self.timings, key=lambda timing: timing[3], reverse=True
+        )[:top]:
+            lines.append(
+                "{:>10.1f} {:>10.1f}  {:<6} {}".format(
+                    self_time * 1000, elapsed * 1000, kind, name
+                )
+            )
+        lines.append(
+            ", ".join(
+                "{} {:.1f} ms".format(kind, seconds * 1000)
+                for kind, seconds in self.totals().items()
+            )
+        )
+        return "\n".join(lines)
+
+    def log(self, top: Optional[int] = 25) -> None:
+        """Log the report and stop timing imports."""
+        self.uninstall()
+        logging.getLogger(__name__).info("Startup profile:\n%s", self.report(top))
@@ -1,3 +1,8 @@
 """Query the database."""
 
-from .tmp_queries import HexGridQuery
+from ..lazy import lazy_attributes
+
+# cleanair and sqlalchemy are only loaded when a query is made
+__getattr__ = lazy_attributes(
+    __name__, {"HexGridQuery": ".tmp_queries", "HexGridCache": ".cache"}
+)
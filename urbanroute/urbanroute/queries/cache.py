@@ -0,0 +1,132 @@
+"""Cache hex grid results on local disk so that graphs can be rebuilt offline."""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+import geopandas as gpd
+import pandas as pd
+from shapely import wkb
+
+
+class HexGridCache:
+    """Read-through cache of hex grid air quality results.
+
+    Results are stored as parquet files with the geometry as WKB, one file for
+    each instance id, data id and time window. When the files exceed the size
+    limit, the least recently read are removed.
+    """
+
+    def __init__(self, directory: str, query=None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            directory: Where the parquet files are kept.
+            query: A HexGridQuery that is used when results are not in the cache.
+                If None, only results already in the cache can be read.
+            max_bytes: Size limit of the cache, unbounded if None.
+        """
+        self.directory = directory
+        self.query = query
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(
+        self,
+        instance_id: str,
+        data_id: Optional[str] = None,
+        start_time: Optional[str] = None,
+        upto_time: Optional[str] = None,
+    ) -> str:
+        """Location of the cached results of a query."""
+        key = json.dumps([instance_id, data_id, start_time, upto_time])
+        name = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, name + ".parquet")
+
+    def query_results(  # pylint: disable=too-many-arguments
+        self,
+        instance_id: str,
+        data_id: Optional[str] = None,
+        start_time: Optional[str] = None,
+        upto_time: Optional[str] = None,
+        force_refresh: Optional[bool] = False,
+    ) -> gpd.GeoDataFrame:
+        """Get the predictions on the hex grid, from disk if they have been cached.
+
+        Args:
+            instance_id: The id of the trained model instance.
+            data_id: The id of the dataset the model predicted on.
+            start_time: Get all results on and after this time. ISO formatted.
+            upto_time: Get all results upto but not including this timestamp. ISO formatted.
+
+        Other Args:
+            force_refresh: Query the database even if the results are cached.
+
+        Returns:
+            Results with the hexagon of each point in the geometry column.
+        """
+        path = self.path(instance_id, data_id, start_time, upto_time)
+        if os.path.isfile(path) and not force_refresh:
+            logging.info("Reading cached hex grid results from %s", path)
+            # remember when the results were last used for eviction
+            os.utime(path)
+            return self.read(path)
+        if self.query is None:
+            raise KeyError("Hex grid results are not cached for {}".format(instance_id))
+        gdf = self.query.query_gdf(
+            instance_id, data_id=data_id, start_time=start_time, upto_time=upto_time
+        )
+        self.store(gdf, instance_id, data_id, start_time, upto_time)
+        return gdf
+
+    def store(  # pylint: disable=too-many-arguments
+        self,
+        gdf: gpd.GeoDataFrame,
+        instance_id: str,
+        data_id: Optional[str] = None,
+        start_time: Optional[str] = None,
+        upto_time: Optional[str] = None,
+    ) -> str:
+        """Write the results of a query to the cache, e.g. fixture data for tests.
+
+        Returns:
+            Location of the parquet file.
+        """
+        path = self.path(instance_id, data_id, start_time, upto_time)
+        df = pd.DataFrame(gdf.drop(columns=gdf.geometry.name))
+        df["geometry"] = gdf.geometry.apply(lambda geom: geom.wkb)
+        # write to a temporary file so a failed write never leaves a partial result
+        df.to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+        self.evict()
+        return path
+
+    def read(self, path: str) -> gpd.GeoDataFrame:
+        """Read results from a parquet file in the cache."""
+        df = pd.read_parquet(path)
+        geometry = df.pop("geometry").apply(wkb.loads)
+        return gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
+
+    def nbytes(self) -> int:
+        """Size of the files in the cache."""
+        return sum(os.path.getsize(path) for path in self._files())
+
+    def evict(self) -> None:
+        """Remove the least recently used results until the cache is within its
+        size limit. The most recently used results are always kept."""
+        if self.max_bytes is None:
+            return
+        files = sorted(self._files(), key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in files)
+        while len(files) > 1 and total > self.max_bytes:
+            path = files.pop(0)
+            total -= os.path.getsize(path)
+            os.remove(path)
+            logging.info("Evicted %s from the hex grid cache", path)
+
+    def _files(self):
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".parquet")
+        ]
@@ -4,6 +4,7 @@ In the long term these functions will be integrated into the cleanair module.
 """
 
 from typing import Optional, Any
+import geopandas as gpd
 from sqlalchemy import func
 from cleanair.databases import DBReader
 from cleanair.databases.tables import AirQualityResultTable, HexGrid, MetaPoint
@@ -80,3 +81,34 @@ class HexGridQuery(DBReader):
                     AirQualityResultTable.measurement_start_utc < upto_time
                 )
             return readings
+
+    def query_gdf(
+        self,
+        instance_id: str,
+        data_id: Optional[str] = None,
+        start_time: Optional[str] = None,
+        upto_time: Optional[str] = None,
+    ) -> gpd.GeoDataFrame:
+        """Get the predictions on the hex grid as a geo dataframe.
+
+        Args:
+            instance_id: The id of the trained model instance.
+            data_id: The id of the dataset the model predicted on.
+            start_time: Get all results on and after this time. ISO formatted.
+            upto_time: Get all results upto but not including this timestamp. ISO formatted.
+
+        Returns:
+            Results with the hexagon of each point in the geometry column, in EPSG:4326.
+        """
+        result_sql = self.query_results(
+            instance_id,
+            data_id=data_id,
+            join_hexgrid=True,
+            output_type="sql",
+            start_time=start_time,
+            upto_time=upto_time,
+        )
+        gdf = gpd.GeoDataFrame.from_postgis(
+            result_sql, self.dbcnxn.engine, geom_col="geom", crs=4326
+        )
+        return gdf.rename(columns=dict(geom="geometry")).set_geometry("geometry")
@@ -0,0 +1,4 @@
+"""Graphs loaded into memory for answering routing queries."""
+
+from .graph import RoutingGraph, distance_heuristic
+from .registry import GraphRegistry, Region, RegionNotFound
@@ -0,0 +1,117 @@
+"""Compact encodings of routes for responses."""
+
+from enum import Enum
+from typing import Dict, List
+import numpy as np
+
+# enough 5 bit chunks for any 32 bit value
+CHUNKS = 7
+
+
+class Encoding(str, Enum):
+    """How routes are written in a response.
+
+    json: a list of {"x": x, "y": y} for every vertex.
+    polyline: an encoded polyline (precision 5) of latitude, longitude for each route.
+    array: a flat [longitude, latitude, longitude, latitude, ...] array for each route.
+    """
+
+    json = "json"
+    polyline = "polyline"
+    array = "array"
+
+
+def encode_polyline(lat: np.ndarray, lon: np.ndarray, precision: int = 5) -> str:
+    """
+    Encode coordinates with the encoded polyline algorithm, using array operations.
+    Args:
+        lat, lon: latitude and longitude of every point
+        precision: number of decimal places kept
+    Returns:
+        the encoded polyline
+    """
+    if len(lat) == 0:
+        return ""
+    points = np.round(np.column_stack([lat, lon]) * 10 ** precision).astype(np.int64)
+    deltas = np.diff(points, axis=0, prepend=0).ravel()
+    # zig-zag so that small negative values also have few chunks
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    chunks = values[:, None] >> (np.arange(CHUNKS) * 5)
+    count = 1 + np.count_nonzero(chunks[:, 1:], axis=1)
+    position = np.arange(CHUNKS)[None, :]
+    # every chunk but the last of a value is flagged as continuing
+    chars = ((chunks & 0x1F) | (0x20 * (position < count[:, None] - 1))) + 63
+    return chars[position < count[:, None]].astype(np.uint8).tobytes().decode("ascii")
+
+
+def decode_polyline(polyline: str, precision: int = 5) -> np.ndarray:
+    """
+    Decode an encoded polyline.
+    Args:
+        polyline: the encoded polyline
+        precision: number of decimal places kept
+    Returns:
+        nx2 matrix of the latitude, longitude of every point
+    """
+    values = []
+    value = shift = 0
+    for char in polyline:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1F) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    return np.cumsum(np.array(values).reshape(-1, 2), axis=0) / 10 ** precision
+
+
+def common_prefix(route: np.ndarray, other: np.ndarray) -> int:
+    """Number of vertices at the start of two routes that are the same."""
+    n = min(len(route), len(other))
+    different = np.flatnonzero(route[:n] != other[:n])
+    return int(different[0]) if len(different) else n
+
+
+def encode_routes(  # pylint: disable=too-many-arguments
+    routes: List[np.ndarray],
+    lon: np.ndarray,
+    lat: np.ndarray,
+    lengths: List[float],
+    exposures: List[float],
+    encoding: Encoding,
+    share_prefixes: bool = False,
+) -> Dict:
+    """
+    Encode routes with their total length and exposure.
+    Args:
+        routes: the vertices of each route
+        lon, lat: longitude and latitude of every vertex in the graph
+        lengths, exposures: the totals of each route
+        encoding: polyline or array
+        share_prefixes: if true, a route that starts with the same vertices as an
+            earlier route only encodes the vertices after them, and
+            "prefix": [index of the earlier route, number of shared vertices]
+    Returns:
+        {"encoding": encoding, "routes": [{"length", "exposure", and "polyline" or
+        "coordinates"}]}
+    """
+    encoded = []
+    for i, route in enumerate(routes):
+        item = {"length": float(lengths[i]), "exposure": float(exposures[i])}
+        start = 0
+        if share_prefixes and i > 0:
+            shared = [common_prefix(route, routes[j]) for j in range(i)]
+            j = int(np.argmax(shared))
+            # a single shared vertex is cheaper to repeat than to reference
+            if shared[j] > 1:
+                start = shared[j]
+                item["prefix"] = [j, start]
+        vertices = route[start:]
+        if encoding == Encoding.polyline:
+            item["polyline"] = encode_polyline(lat[vertices], lon[vertices])
+        else:
+            item["coordinates"] = (
+                np.column_stack([lon[vertices], lat[vertices]]).ravel().tolist()
+            )
+        encoded.append(item)
+    return {"encoding": Encoding(encoding).value, "routes": encoded}
@@ -0,0 +1,301 @@
+"""A graph of one region, prepared for answering routing queries."""
+
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from graph_tool import Graph, GraphView, load_graph  # not .all, which loads matplotlib
+from haversine import haversine
+from .encoding import Encoding, encode_routes
+from ..geospatial import (
+    SpatialGrid,
+    ellipse_bounding_box,
+    coord_match,
+    edges_in_areas,
+    parse_linestring,
+    remove_leaves,
+    remove_paths,
+)
+
+# estimated memory held per vertex and per edge by graph-tool that has no array to
+# measure: the adjacency lists, the position vectors and the string properties
+# read from disk
+ESTIMATED_BYTES_PER_VERTEX = 250
+ESTIMATED_BYTES_PER_EDGE = 350
+
+
+def distance_heuristic(v, target, pos):
+    """the distance heuristic is the haversine distance, it can also be used for pollution"""
+    return haversine(
+        (pos[v].a[0], pos[v].a[1]), (pos[target].a[0], pos[target].a[1]), unit="m"
+    )
+
+
+class RoutingGraph:  # pylint: disable=too-many-instance-attributes
+    """A graph with float position, length and pollution properties and a filter
+    of vertices removed by graph simplification.
+
+    Attributes:
+        G: The graph. Vertices outside the current query are filtered out.
+        pos: Position of each vertex as a (longitude, latitude) vector.
+        float_length: Length of each edge.
+        pollution: Pollution exposure of each edge, mean NO2 multiplied by length.
+        vertices: nx2 matrix of the longitude, latitude of every vertex.
+        vertex_grid: Spatial index of the vertices, see prune.
+        kept: Filter of the edges not in the areas avoided by the current query.
+        edge_grid: Spatial index of the segments of the edge polylines, see avoid.
+        nbytes: Memory held by the graph, measured from its arrays and float
+            properties, plus an estimate of the memory held by graph-tool.
+    """
+
+    def __init__(self, G: Graph):
+        self.G = G
+        # add position property, and add float versions of string edge attributes
+        self.pos = G.new_vertex_property("vector<double>")
+        self.float_length = G.new_edge_property("double")
+        self.float_x = G.new_vertex_property("double")
+        self.float_y = G.new_vertex_property("double")
+        self.pollution = G.new_edge_property("double")
+        G.edge_properties["float_length"] = self.float_length
+        G.edge_properties["pollution"] = self.pollution
+        mean = G.edge_properties["NO2_mean"]
+        length = G.edge_properties["length"]
+        # used in linear scalarisation
+        self.scalarisation = G.new_edge_property("double")
+        self.x = G.vertex_properties["x"]
+        self.y = G.vertex_properties["y"]
+        for v in G.get_vertices():
+            self.pos[v] = [float(self.x[v]), float(self.y[v])]
+            self.float_x[v] = float(self.x[v])
+            self.float_y[v] = float(self.y[v])
+        for e in G.edges():
+            self.float_length[e] = float(length[e])
+            self.pollution[e] = float(mean[e]) * float(length[e])
+
+        self.inside = G.new_vertex_property("bool")
+        self.del_list = G.new_vertex_property("bool")
+        for v in G.vertices():
+            self.del_list[v] = True
+
+        # do graph simplification
+        remove_leaves(G, self.del_list)
+        bridges = remove_paths(G, self.del_list, self.pos, length, self.pollution)
+
+        # set up numpy array of vertices with just the position
+        self.vertices = G.get_vertices(vprops=[self.float_x, self.float_y])
+        self.vertices = np.delete(self.vertices, 0, 1)
+        # vertices bucketed by position, so a query only looks at the vertices near it
+        self.vertex_grid = SpatialGrid(np.hstack([self.vertices, self.vertices]))
+        # vertices inside the current query, cleared by the next
+        self.selected = np.empty(0, dtype=np.int64)
+
+        # edges sorted by source and target to look up the costs along routes. The
+        # length and pollution of the edges from the i-th pair of vertices are the
+        # rows edge_starts[i] to edge_starts[i + 1] of edge_costs, several rows for
+        # parallel edges.
+        edges = G.get_edges([self.float_length, self.pollution])
+        self.num_vertices = G.num_vertices()
+        keys = edges[:, 0].astype(np.int64) * self.num_vertices + edges[:, 1].astype(
+            np.int64
+        )
+        order = np.argsort(keys, kind="stable")
+        self.edge_keys, starts = np.unique(keys[order], return_index=True)
+        self.edge_starts = np.append(starts, len(order))
+        self.edge_costs = edges[order, 2:4]
+
+        # segments of the polyline of every edge indexed by their bounding boxes, to
+        # find the edges in areas to avoid. The polyline of an edge is its geometry
+        # if the graph has one, else its source and target, and edges added by
+        # remove_paths follow the two edges they bridge.
+        polylines = self._polylines(G, bridges)
+        self.segment_edges = np.repeat(
+            np.arange(len(polylines)), [len(line) - 1 for line in polylines]
+        )
+        self.edge_segments = np.vstack(
+            [np.hstack([line[:-1], line[1:]]) for line in polylines]
+            + [np.empty((0, 4))]
+        )
+        self.edge_grid = SpatialGrid(
+            np.column_stack(
+                [
+                    np.minimum(self.edge_segments[:, 0], self.edge_segments[:, 2]),
+                    np.minimum(self.edge_segments[:, 1], self.edge_segments[:, 3]),
+                    np.maximum(self.edge_segments[:, 0], self.edge_segments[:, 2]),
+                    np.maximum(self.edge_segments[:, 1], self.edge_segments[:, 3]),
+                ]
+            )
+        )
+        self.kept = G.new_edge_property("bool", val=True)
+        # edges filtered out by the current query, restored by the next
+        self.avoided = np.empty(0, dtype=np.int64)
+        self.nbytes = self._measure()
+
+    def _polylines(self, G: Graph, bridges: list) -> List[np.ndarray]:
+        """Longitude, latitude of the points along each edge, by edge index."""
+        geometry = (
+            G.edge_properties["geometry"] if "geometry" in G.edge_properties else None
+        )
+        # edges loaded from disk are indexed from 0 without gaps
+        polylines = [None] * G.edge_index_range
+        for e in G.edges():
+            line = None if geometry is None else parse_linestring(geometry[e])
+            if line is None:
+                line = np.array(
+                    [self.pos[e.source()].a[:2], self.pos[e.target()].a[:2]]
+                )
+            polylines[int(G.edge_index[e])] = line
+        for new, into, outof in bridges:
+            polylines[int(G.edge_index[new])] = np.vstack(
+                [
+                    polylines[int(G.edge_index[into])],
+                    polylines[int(G.edge_index[outof])][1:],
+                ]
+            )
+        return polylines
+
+    def _measure(self) -> int:
+        """Bytes of the arrays and float properties held for routing, plus the
+        estimated bytes held by graph-tool that have no array."""
+        arrays = [
+            value for value in vars(self).values() if isinstance(value, np.ndarray)
+        ]
+        for grid in (self.vertex_grid, self.edge_grid):
+            arrays += [grid.items, grid.starts]
+        properties = [
+            self.float_length,
+            self.float_x,
+            self.float_y,
+            self.pollution,
+            self.scalarisation,
+            self.inside,
+            self.del_list,
+            self.kept,
+        ]
+        return (
+            sum(array.nbytes for array in arrays)
+            + sum(prop.a.nbytes for prop in properties)
+            + self.G.num_vertices() * ESTIMATED_BYTES_PER_VERTEX
+            + self.G.num_edges() * ESTIMATED_BYTES_PER_EDGE
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RoutingGraph":
+        """Load a graph in .gt format from disk and prepare it for routing."""
+        logging.info("Loading graph from %s...", path)
+        start = time.time()
+        graph = cls(load_graph(path))
+        logging.info("Graph loaded in %s seconds.", time.time() - start)
+        logging.info(
+            "%s nodes and %s edges in the graph.",
+            graph.G.num_vertices(),
+            graph.G.num_edges(),
+        )
+        return graph
+
+    def match(self, coord: Tuple[float, float]) -> int:
+        """Closest vertex to a (latitude, longitude) coordinate."""
+        return coord_match(self.vertices, coord, self.pos, grid=self.vertex_grid)
+
+    def avoid(self, areas: List[np.ndarray]) -> np.ndarray:
+        """Edge index of every edge whose polyline intersects any of the polygons."""
+        segments = edges_in_areas(self.edge_grid, self.edge_segments, areas)
+        return np.unique(self.segment_edges[segments])
+
+    def prune(
+        self, source: int, target: int, avoid: Optional[List[np.ndarray]] = None
+    ) -> None:
+        """
+        Filter the graph down to the vertices that can be on a short path from the
+        source to the target and that were not removed by graph simplification,
+        and filter out the edges that cross the areas to avoid.
+        avoid: polygons as mx2 matrices of longitude, latitude, see parse_polygon.
+        """
+        # create box around the source and target vertices to eliminate points
+        # that are (probably) too far away to be part of a shortest path
+        box = ellipse_bounding_box(self.pos[source], self.pos[target])
+
+        # Euclidean heuristic. If a vertex is not in the box, make its heuristic value infinite
+        # so that it is never extended. Only the vertices in the grid cells overlapping
+        # the box are looked at, and only the vertices of the previous query are
+        # cleared, so short queries are quick however large the graph.
+        lower_left = np.array([box[3], box[1]])
+        upper_right = np.array([box[2], box[0]])
+        candidates = self.vertex_grid.query(*lower_left, *upper_right)
+        position = self.vertices[candidates]
+        in_box = np.all(
+            np.logical_and(lower_left <= position, position <= upper_right), axis=1
+        )
+        self.inside.a[self.selected] = False
+        # include the main delete list as a filter also
+        self.selected = candidates[np.logical_and(in_box, self.del_list.a[candidates])]
+        self.inside.a[self.selected] = True
+        # preserve source and target
+        self.selected = np.append(self.selected, [source, target])
+        self.inside[source] = True
+        self.inside[target] = True
+        self.G.set_vertex_filter(self.inside)
+
+        # only the edges avoided by the previous query need to be restored
+        self.kept.a[self.avoided] = True
+        self.avoided = self.avoid(avoid) if avoid else np.empty(0, dtype=np.int64)
+        self.kept.a[self.avoided] = False
+        self.G.set_edge_filter(self.kept)
+
+    def coordinates(self, route: List[int]) -> List[Dict[str, str]]:
+        """The x and y of every vertex on a route."""
+        return [{"x": self.x[r], "y": self.y[r]} for r in route]
+
+    def totals(self, route: np.ndarray, weight: float = 1.0) -> Tuple[float, float]:
+        """
+        Total length and pollution exposure along a route from source to target.
+        Both are taken from the same edge between each pair of vertices: of any
+        parallel edges, the one that a search minimising
+        weight * length + (1 - weight) * pollution would take, so 1 for the shortest
+        route and 0 for the least polluted one.
+        """
+        pairs = np.searchsorted(
+            self.edge_keys, route[:-1] * self.num_vertices + route[1:]
+        )
+        edges = self.edge_starts[pairs]
+        for i in np.flatnonzero(self.edge_starts[pairs + 1] - edges > 1):
+            costs = self.edge_costs[edges[i] : self.edge_starts[pairs[i] + 1]]
+            edges[i] += np.argmin(costs @ [weight, 1 - weight])
+        length, exposure = self.edge_costs[edges].sum(axis=0)
+        return length, exposure
+
+    def encode(
+        self,
+        routes: List[List[int]],
+        encoding: Encoding,
+        share_prefixes: bool = False,
+        weight: float = 1.0,
+        totals: Optional[List[Tuple[float, float]]] = None,
+    ) -> Dict:
+        """
+        Compact encoding of routes from source to target with their total length and
+        exposure, see encode_routes. The weight of the search the routes come from
+        chooses between parallel edges, see totals, unless the totals are given,
+        e.g. the costs of a pareto front whose routes differ only in parallel edges.
+        """
+        routes = [
+            np.fromiter((int(v) for v in route), dtype=np.int64, count=len(route))
+            for route in routes
+        ]
+        if totals is None:
+            totals = [self.totals(route, weight) for route in routes]
+        return encode_routes(
+            routes,
+            self.float_x.a,
+            self.float_y.a,
+            [length for length, _ in totals],
+            [exposure for _, exposure in totals],
+            encoding,
+            share_prefixes=share_prefixes,
+        )
+
+    def snapshot(self) -> GraphView:
+        """
+        A view of the graph with the current filter, unaffected by later calls to prune.
+        Used by searches that are interleaved with other queries, e.g. streamed ones.
+        """
+        return GraphView(self.G, vfilt=self.inside.a.copy(), efilt=self.kept.a.copy())
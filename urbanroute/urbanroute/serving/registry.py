@@ -0,0 +1,143 @@
+"""Choose, lazily load and evict the graphs of several regions."""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, NamedTuple, Optional, Tuple
+from .graph import RoutingGraph
+
+
+class RegionNotFound(ValueError):
+    """No region contains every coordinate of a query."""
+
+
+class Region(NamedTuple):
+    """A region served from one graph file.
+
+    Attributes:
+        name: Unique name of the region, e.g. a borough.
+        path: Location of the graph in .gt format.
+        bounds: West, south, east, north of the graph in degrees.
+    """
+
+    name: str
+    path: str
+    bounds: Tuple[float, float, float, float]
+
+    def contains(self, coord: Tuple[float, float]) -> bool:
+        """True if a (latitude, longitude) coordinate is inside the region."""
+        west, south, east, north = self.bounds
+        return west <= coord[1] <= east and south <= coord[0] <= north
+
+    def area(self) -> float:
+        """Area of the bounds in square degrees."""
+        west, south, east, north = self.bounds
+        return (east - west) * (north - south)
+
+
+class GraphRegistry:
+    """Serve the graphs of many regions while keeping only the recently used
+    ones in memory.
+
+    Graphs are loaded on first use. When the graphs in memory exceed the
+    memory budget, the least recently used regions are evicted.
+    """
+
+    def __init__(
+        self,
+        regions: List[Region],
+        memory_budget: Optional[int] = None,
+        loader: Callable[[str], RoutingGraph] = RoutingGraph.load,
+    ):
+        """
+        Args:
+            regions: Every region that can be served.
+            memory_budget: Bytes of graphs kept in memory, unbounded if None.
+            loader: Function that loads the graph at a region's path.
+        """
+        self.regions = OrderedDict((region.name, region) for region in regions)
+        self.memory_budget = memory_budget
+        self.loader = loader
+        # loaded graphs, from least to most recently used
+        self._graphs = OrderedDict()
+        self._lock = threading.Lock()
+        # held while the graph of a region loads, so that only queries of that
+        # region wait for it; the server calls get from worker threads for this
+        self._loading = {name: threading.Lock() for name in self.regions}
+
+    @classmethod
+    def from_file(
+        cls, path: str, memory_budget: Optional[int] = None
+    ) -> "GraphRegistry":
+        """Read regions from a json list of objects with name, path and bounds.
+        Graph paths are relative to the json file."""
+        with open(path, "r") as read_file:
+            data = json.load(read_file)
+        directory = os.path.dirname(path)
+        regions = [
+            Region(
+                region["name"],
+                os.path.join(directory, region["path"]),
+                tuple(region["bounds"]),
+            )
+            for region in data
+        ]
+        return cls(regions, memory_budget=memory_budget)
+
+    def region_for(self, *coords: Tuple[float, float]) -> Region:
+        """The smallest region containing every (latitude, longitude) coordinate."""
+        candidates = [
+            region
+            for region in self.regions.values()
+            if all(region.contains(coord) for coord in coords)
+        ]
+        if not candidates:
+            raise RegionNotFound("No region contains all of {}".format(coords))
+        return min(candidates, key=Region.area)
+
+    def get(self, *coords: Tuple[float, float]) -> RoutingGraph:
+        """The graph of the smallest region containing every coordinate."""
+        return self[self.region_for(*coords).name]
+
+    def __getitem__(self, name: str) -> RoutingGraph:
+        graph = self._lookup(name)
+        if graph is not None:
+            return graph
+        with self._loading[name]:
+            # another query may have loaded the graph while this one waited
+            graph = self._lookup(name)
+            if graph is not None:
+                return graph
+            graph = self.loader(self.regions[name].path)
+            with self._lock:
+                self._graphs[name] = graph
+                self._evict()
+            return graph
+
+    def _lookup(self, name: str) -> Optional[RoutingGraph]:
+        """The graph of a region if it is in memory, marking it as recently used."""
+        with self._lock:
+            if name not in self._graphs:
+                return None
+            self._graphs.move_to_end(name)
+            return self._graphs[name]
+
+    @property
+    def resident(self) -> List[str]:
+        """Names of the regions in memory, from least to most recently used."""
+        return list(self._graphs)
+
+    def memory_usage(self) -> int:
+        """Bytes held by the graphs in memory, see RoutingGraph.nbytes."""
+        return sum(graph.nbytes for graph in self._graphs.values())
+
+    def _evict(self) -> None:
+        """Remove least recently used graphs until within the memory budget.
+        The most recently used graph is always kept."""
+        if self.memory_budget is None:
+            return
+        while len(self._graphs) > 1 and self.memory_usage() > self.memory_budget:
+            name, _ = self._graphs.popitem(last=False)
+            logging.info("Evicted the graph of %s from memory.", name)
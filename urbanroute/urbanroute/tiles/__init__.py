@@ -0,0 +1,9 @@
+"""XYZ raster tile pyramids of air quality results."""
+
+from ..lazy import lazy_attributes
+from .coords import mercator_bounds, tile_bounds, tile_path, tiles_for_bounds
+
+# rendering needs matplotlib and geopandas, serving tiles does not
+__getattr__ = lazy_attributes(
+    __name__, {"build_pyramid": ".pyramid", "render_tile": ".pyramid"}
+)
@@ -0,0 +1,73 @@
+"""
+    Coordinates of XYZ (slippy map) tiles in web mercator.
+"""
+import math
+import os
+from typing import Iterator, Tuple
+
+# half the circumference of the earth in web mercator (EPSG:3857) metres
+ORIGIN_SHIFT = 20037508.342789244
+
+
+def mercator_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Bounds of a tile in web mercator.
+    Args:
+        z, x, y: zoom level, column and row of the tile
+    Returns:
+        west, south, east, north in EPSG:3857 metres
+    """
+    size = 2 * ORIGIN_SHIFT / 2 ** z
+    west = -ORIGIN_SHIFT + x * size
+    north = ORIGIN_SHIFT - y * size
+    return west, north - size, west + size, north
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Bounds of a tile in longitude, latitude.
+    Args:
+        z, x, y: zoom level, column and row of the tile
+    Returns:
+        west, south, east, north in degrees
+    """
+    n = 2 ** z
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, latitude(y + 1), (x + 1) / n * 360 - 180, latitude(y)
+
+
+def lonlat_to_tile(lon: float, lat: float, z: int) -> Tuple[int, int]:
+    """The column and row of the tile at zoom level z that contains a point."""
+    n = 2 ** z
+    lat = math.radians(lat)
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2 * n)
+    # points on the east or south edge of the world belong to the last tile
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_for_bounds(
+    bounds: Tuple[float, float, float, float], z: int
+) -> Iterator[Tuple[int, int]]:
+    """
+    Every tile at a zoom level that overlaps a bounding box.
+    Args:
+        bounds: west, south, east, north in degrees
+        z: zoom level
+    Returns:
+        column, row of each tile
+    """
+    west, south, east, north = bounds
+    min_x, min_y = lonlat_to_tile(west, north, z)
+    max_x, max_y = lonlat_to_tile(east, south, z)
+    for x in range(min_x, max_x + 1):
+        for y in range(min_y, max_y + 1):
+            yield x, y
+
+
+def tile_path(directory: str, z: int, x: int, y: int) -> str:
+    """Location of a rendered tile in a pyramid directory."""
+    return os.path.join(directory, str(z), str(x), "{}.png".format(y))
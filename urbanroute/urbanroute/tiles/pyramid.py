@@ -0,0 +1,130 @@
+"""Render air quality results into a pyramid of XYZ raster tiles."""
+
+import logging
+import os
+from multiprocessing import Pool
+from typing import Optional, Tuple
+import geopandas as gpd
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # pylint: disable=wrong-import-position
+
+from .coords import (  # pylint: disable=wrong-import-position
+    mercator_bounds,
+    tile_path,
+    tiles_for_bounds,
+)
+
+# dataframe shared with the worker processes, set by _init_worker
+_WORKER_STATE = {}
+
+
+def render_tile(  # pylint: disable=too-many-arguments
+    gdf: gpd.GeoDataFrame,
+    z: int,
+    x: int,
+    y: int,
+    directory: str,
+    column: Optional[str] = "NO2_mean",
+    vmin: Optional[float] = None,
+    vmax: Optional[float] = None,
+    cmap: Optional[str] = "inferno",
+    size: Optional[int] = 256,
+) -> bool:
+    """Render one tile of a geo dataframe to a transparent png.
+
+    Args:
+        gdf: Geo dataframe in web mercator (EPSG:3857).
+        z, x, y: Zoom level, column and row of the tile.
+        directory: Root directory of the tile pyramid.
+
+    Other Args:
+        column: Name of the value column to colour by.
+        vmin: Value mapped to the bottom of the colour map.
+        vmax: Value mapped to the top of the colour map.
+        cmap: Name of the matplotlib colour map.
+        size: Width and height of the tile in pixels.
+
+    Returns:
+        True if the tile was written, False if no geometry overlaps the tile.
+    """
+    west, south, east, north = mercator_bounds(z, x, y)
+    tile_gdf = gdf.cx[west:east, south:north]
+    if tile_gdf.empty:
+        return False
+
+    fig = plt.figure(figsize=(1, 1), dpi=size)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    tile_gdf.plot(column=column, ax=ax, cmap=cmap, vmin=vmin, vmax=vmax)
+    ax.set_xlim(west, east)
+    ax.set_ylim(south, north)
+
+    path = tile_path(directory, z, x, y)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fig.savefig(path, transparent=True, dpi=size)
+    plt.close(fig)
+    return True
+
+
+def _init_worker(gdf: gpd.GeoDataFrame, kwargs: dict) -> None:
+    """Keep one copy of the dataframe per process rather than one per tile."""
+    _WORKER_STATE["gdf"] = gdf
+    _WORKER_STATE["kwargs"] = kwargs
+
+
+def _render_worker(tile: Tuple[int, int, int]) -> bool:
+    z, x, y = tile
+    return render_tile(_WORKER_STATE["gdf"], z, x, y, **_WORKER_STATE["kwargs"])
+
+
+def build_pyramid(  # pylint: disable=too-many-arguments
+    gdf: gpd.GeoDataFrame,
+    directory: str,
+    min_zoom: Optional[int] = 10,
+    max_zoom: Optional[int] = 16,
+    column: Optional[str] = "NO2_mean",
+    cmap: Optional[str] = "inferno",
+    processes: Optional[int] = None,
+) -> int:
+    """Render every tile between two zoom levels that overlaps a geo dataframe.
+
+    Tiles are rendered in parallel across processes. Every tile shares one colour
+    scale so that neighbouring tiles and zoom levels match.
+
+    Args:
+        gdf: Must contain geometry column and value column.
+        directory: Root directory of the tile pyramid, tiles are written to z/x/y.png.
+
+    Other Args:
+        min_zoom: Lowest zoom level rendered.
+        max_zoom: Highest zoom level rendered.
+        column: Name of the value column to colour by.
+        cmap: Name of the matplotlib colour map.
+        processes: Number of worker processes, defaults to the number of cpus.
+
+    Returns:
+        Number of tiles written.
+    """
+    if gdf.crs is None:
+        gdf.crs = "EPSG:4326"
+    bounds = tuple(gdf.to_crs(epsg=4326).total_bounds)
+    mercator = gdf.to_crs(epsg=3857)
+    kwargs = dict(
+        directory=directory,
+        column=column,
+        vmin=mercator[column].min(),
+        vmax=mercator[column].max(),
+        cmap=cmap,
+    )
+    tiles = [
+        (z, x, y)
+        for z in range(min_zoom, max_zoom + 1)
+        for x, y in tiles_for_bounds(bounds, z)
+    ]
+    logging.info("Rendering %s tiles at zoom %s to %s", len(tiles), min_zoom, max_zoom)
+    with Pool(processes, initializer=_init_worker, initargs=(mercator, kwargs)) as pool:
+        written = sum(pool.imap_unordered(_render_worker, tiles, chunksize=16))
+    logging.info("%s tiles written to %s", written, directory)
+    return written